@@ -0,0 +1,284 @@
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import InvalidPage
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django_filters.utils import translate_validation
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from api.authentication import CachedTokenAuthentication
+from api.caching import (cache_response, get_cached_response,
+                         get_user_recipe_ids, get_version,
+                         response_cache_key)
+from api.fast_serializers import (IngredientValuesSerializer,
+                                  TagValuesSerializer)
+from api.filters import RecipeSearchFilter
+from api.pagination import (LimitOffsetApproximatePagination,
+                            RecipePagination, get_count)
+from api.search import ingredient_index
+from api.serializers import (IngredientSerializer, RecipeSerializer,
+                             SubscriptionShowSerializer, TagSerializer)
+from api.utils import (annotate_subscriptions, get_recipes_limit,
+                       get_recipes_queryset)
+from recipes.models import Ingredient, Tag
+from users.models import User
+
+
+def database(func):
+    """Синхронная функция с запросами к БД для асинхронных представлений.
+
+    В Django 3.2 нет асинхронного ORM, поэтому каждый вызов выполняется
+    в отдельном потоке со своим соединением: независимые запросы,
+    собранные в asyncio.gather, идут к БД одновременно.
+    """
+
+    @sync_to_async(thread_sensitive=False)
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return wrapper
+
+
+def render(data, status=200):
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(
+        renderer.render(data), status=status,
+        content_type=renderer.media_type)
+
+
+def api_view(version=None):
+    """Асинхронное представление только для чтения с аутентификацией
+    по токену, ошибками DRF и условным GET по версии набора данных."""
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return handle_exception(
+                    exceptions.MethodNotAllowed(request.method))
+            if version is not None:
+                current = await database(get_version)(version)
+                etag = quote_etag(f'{version}-{current}')
+                last_modified = int(current)
+                response = get_conditional_response(
+                    request, etag=etag, last_modified=last_modified)
+                if response is not None:
+                    return response
+            request = Request(request)
+            try:
+                request.user = await authenticate(request)
+                response = render(await view(request, *args, **kwargs))
+            except exceptions.APIException as exc:
+                return handle_exception(exc)
+            if version is not None:
+                response['ETag'] = etag
+                response['Last-Modified'] = http_date(last_modified)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def handle_exception(exc):
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {'detail': exc.detail}
+    response = render(data, status=exc.status_code)
+    if isinstance(exc, (exceptions.NotAuthenticated,
+                        exceptions.AuthenticationFailed)):
+        response.status_code = 401
+        response['WWW-Authenticate'] = (
+            CachedTokenAuthentication().authenticate_header(None))
+    return response
+
+
+@database
+def authenticate(request):
+    credentials = CachedTokenAuthentication().authenticate(request)
+    if credentials is None:
+        return AnonymousUser()
+    return credentials[0]
+
+
+@database
+def get_subscriptions(user):
+    return set(user.subscriber.values_list('author_id', flat=True))
+
+
+def user_context(request):
+    """Множества id для полей is_favorited, is_in_shopping_cart
+    и is_subscribed загружаются одновременно."""
+
+    names = ('favorites', 'shopping_cart', 'subscriptions')
+    if request.user.is_anonymous:
+        return names, []
+    return names, [
+        database(get_user_recipe_ids)(request.user, 'favorites'),
+        database(get_user_recipe_ids)(request.user, 'shopping_cart'),
+        get_subscriptions(request.user),
+    ]
+
+
+async def gather_context(request, *queries):
+    """Выполняет запросы вместе с загрузкой множеств пользователя
+    и возвращает их результаты и контекст сериализатора."""
+
+    names, user_queries = user_context(request)
+    results = await asyncio.gather(*queries, *user_queries)
+    context = {'request': request}
+    context.update(zip(names, results[len(queries):]))
+    return results[:len(queries)], context
+
+
+@database
+def serialize(serializer_class, instance, context, many=False):
+    return serializer_class(instance, context=context, many=many).data
+
+
+@database
+def filter_recipes(request):
+    filterset = RecipeSearchFilter(
+        request.query_params, queryset=get_recipes_queryset(),
+        request=request)
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+    return filterset.qs
+
+
+@database
+def paginate(pagination, queryset, request):
+    return pagination.paginate_queryset(queryset, request)
+
+
+@database
+def fetch(queryset):
+    return list(queryset)
+
+
+@database
+def get_anonymous_response(request):
+    key = response_cache_key(request, 'recipes')
+    return key, get_cached_response(key)
+
+
+@api_view()
+async def recipe_list(request):
+    """Список рецептов: строки страницы, число рецептов и множества
+    пользователя загружаются одновременно, ответы анонимным
+    пользователям берутся из общего кеша, как в RecipeViewSet."""
+
+    if request.user.is_anonymous:
+        key, data = await get_anonymous_response(request)
+        if data is None:
+            data = await build_recipe_list(request)
+            await database(cache_response)(key, data)
+        return data
+    return await build_recipe_list(request)
+
+
+async def build_recipe_list(request):
+    queryset = await filter_recipes(request)
+    pagination = RecipePagination()
+    number = request.query_params.get(pagination.page_query_param, '1')
+    if (pagination.cursor_query_param in request.query_params
+            or not number.isdigit() or int(number) < 1):
+        (page,), context = await gather_context(
+            request, paginate(pagination, queryset, request))
+    else:
+        number = int(number)
+        page_size = pagination.get_page_size(request)
+        offset = (number - 1) * page_size
+        (count, rows), context = await gather_context(
+            request,
+            database(get_count)(queryset),
+            fetch(queryset[offset:offset + page_size + 1]),
+        )
+        paginator = pagination.django_paginator_class(queryset, page_size)
+        paginator.count, paginator.count_is_approximate = count
+        try:
+            pagination.page = paginator.page_from_rows(rows, number)
+        except InvalidPage as exc:
+            raise exceptions.NotFound(pagination.invalid_page_message.format(
+                page_number=number, message=str(exc)))
+        pagination.request = request
+        page = list(pagination.page)
+    data = await serialize(RecipeSerializer, page, context, many=True)
+    return pagination.get_paginated_response(data).data
+
+
+@api_view()
+async def recipe_detail(request, pk):
+    (recipe,), context = await gather_context(
+        request, fetch(get_recipes_queryset().filter(pk=pk)))
+    if not recipe:
+        raise exceptions.NotFound()
+    return await serialize(RecipeSerializer, recipe[0], context)
+
+
+@api_view()
+async def subscription_list(request):
+    """Подписки: авторы на странице, их число и подписки пользователя
+    загружаются одновременно."""
+
+    if request.user.is_anonymous:
+        raise exceptions.NotAuthenticated()
+    authors = User.objects.filter(author__subscriber=request.user)
+    pagination = LimitOffsetApproximatePagination()
+    pagination.request = request
+    pagination.limit = pagination.get_limit(request)
+    pagination.offset = pagination.get_offset(request)
+    (count, rows), context = await gather_context(
+        request,
+        database(get_count)(authors),
+        fetch(annotate_subscriptions(authors, get_recipes_limit(request))[
+            pagination.offset:pagination.offset + pagination.limit + 1]),
+    )
+    pagination.count, pagination.count_is_approximate = count
+    page = pagination.page_from_rows(rows)
+    data = await serialize(
+        SubscriptionShowSerializer, page, context, many=True)
+    return pagination.get_paginated_response(data).data
+
+
+@api_view('tags')
+async def tag_list(request):
+    return await serialize(
+        TagValuesSerializer, Tag.objects.all(), {}, many=True)
+
+
+@api_view('tags')
+async def tag_detail(request, pk):
+    tag = await fetch(Tag.objects.filter(pk=pk))
+    if not tag:
+        raise exceptions.NotFound()
+    return await serialize(TagSerializer, tag[0], {})
+
+
+@api_view('ingredients')
+async def ingredient_list(request):
+    name = request.query_params.get('name')
+    if name:
+        return await database(ingredient_index.search)(name)
+    return await serialize(
+        IngredientValuesSerializer, Ingredient.objects.all(), {}, many=True)
+
+
+@api_view('ingredients')
+async def ingredient_detail(request, pk):
+    ingredient = await fetch(Ingredient.objects.filter(pk=pk))
+    if not ingredient:
+        raise exceptions.NotFound()
+    return await serialize(IngredientSerializer, ingredient[0], {})
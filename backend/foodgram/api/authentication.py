@@ -0,0 +1,46 @@
+import hashlib
+
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import SAFE_METHODS
+
+from foodgram.constants import AUTH_TOKEN_TIMEOUT
+
+TOKEN_KEY = 'token:{}'
+
+
+def get_token_cache_key(key):
+    """Ключ кеша для токена; сам токен в ключ не попадает."""
+
+    return TOKEN_KEY.format(hashlib.sha256(key.encode()).hexdigest())
+
+
+def forget_tokens(keys):
+    cache.delete_many([get_token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену с кешированием пары токен - пользователь.
+
+    Запись удаляется из кеша при удалении токена (выход через
+    auth/token/logout) и при изменении пользователя. Запросы,
+    изменяющие данные, кеш не используют и получают пользователя
+    прямо из БД: представления могут сохранить его целиком, а часть
+    полей меняется запросами UPDATE без сброса кеша.
+    """
+
+    use_cache = True
+
+    def authenticate(self, request):
+        self.use_cache = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        if not self.use_cache:
+            return super().authenticate_credentials(key)
+        cache_key = get_token_cache_key(key)
+        credentials = cache.get(cache_key)
+        if credentials is None:
+            credentials = super().authenticate_credentials(key)
+            cache.set(cache_key, credentials, AUTH_TOKEN_TIMEOUT)
+        return credentials
@@ -0,0 +1,147 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import transaction
+from django.views.decorators.http import condition
+
+from foodgram.constants import RESPONSE_CACHE_TIMEOUT, USER_RECIPES_TIMEOUT
+
+VERSION_KEY = 'version:{}'
+USER_RECIPES_KEY = '{}:{}'
+RESPONSE_KEY = 'response:{}:{}:{}'
+RESPONSE_CACHE_EVENT_KEY = 'response_cache:{}'
+RESPONSE_CACHE_EVENTS = ('hits', 'misses', 'invalidations')
+
+
+def get_version(name):
+    """Версия набора данных name, метка времени последнего изменения.
+
+    Если версии ещё нет в кеше, она создаётся текущим временем.
+    """
+
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    """Новая версия набора данных name после его изменения."""
+
+    cache.set(VERSION_KEY.format(name), time.time(), timeout=None)
+
+
+def versioned_condition(name):
+    """Условный GET по версии набора данных name.
+
+    Запрос с совпадающим If-None-Match или If-Modified-Since
+    получает 304 до вызова представления и обращения к БД.
+    """
+
+    def etag(request, *args, **kwargs):
+        return f'{name}-{get_version(name)}'
+
+    def last_modified(request, *args, **kwargs):
+        return datetime.fromtimestamp(get_version(name), tz=timezone.utc)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def increment(key, delta=1):
+    """Счётчик в кеше, общий для всех процессов."""
+
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, delta, timeout=None)
+
+
+def count_cache_event(event):
+    """Счётчик попаданий, промахов или сбросов кеша ответов,
+    общий для всех процессов."""
+
+    increment(RESPONSE_CACHE_EVENT_KEY.format(event))
+
+
+def get_cache_events():
+    keys = {
+        event: RESPONSE_CACHE_EVENT_KEY.format(event)
+        for event in RESPONSE_CACHE_EVENTS
+    }
+    values = cache.get_many(keys.values())
+    return {event: values.get(key, 0) for event, key in keys.items()}
+
+
+def invalidate_responses(name):
+    """Новое поколение закешированных ответов набора данных name."""
+
+    bump_version(name)
+    count_cache_event('invalidations')
+
+
+def response_cache_key(request, name):
+    """Ключ ответа по версии набора данных name, адресу запроса
+    и нормализованной строке запроса.
+
+    Параметры и их значения сортируются, поэтому ?page=2&tags=a
+    и ?tags=a&page=2 попадают в одну запись. Ссылки в ответе
+    абсолютные, поэтому в ключ входят схема и хост.
+    """
+
+    query = urlencode(sorted(
+        (param, sorted(values)) for param, values in request.GET.lists()
+    ), doseq=True)
+    url = f'{request.build_absolute_uri(request.path)}?{query}'
+    return RESPONSE_KEY.format(
+        name, get_version(name), hashlib.sha256(url.encode()).hexdigest())
+
+
+def get_cached_response(key):
+    data = cache.get(key)
+    count_cache_event('misses' if data is None else 'hits')
+    return data
+
+
+def cache_response(key, data):
+    cache.set(key, data, RESPONSE_CACHE_TIMEOUT)
+
+
+def get_user_recipe_ids(user, relation):
+    """Множество id рецептов из избранного (relation='favorites')
+    или списка покупок (relation='shopping_cart') пользователя.
+
+    Ключ множества содержит версию, прочитанную до запроса к БД:
+    если множество изменилось, пока оно загружалось, оно сохранится
+    под устаревшим ключом и не будет прочитано.
+    """
+
+    name = USER_RECIPES_KEY.format(relation, user.pk)
+    key = f'{name}:{get_version(name)}'
+    recipe_ids = cache.get(key)
+    if recipe_ids is None:
+        recipe_ids = set(
+            getattr(user, relation).values_list('pk', flat=True))
+        cache.set(key, recipe_ids, USER_RECIPES_TIMEOUT)
+    return recipe_ids
+
+
+def forget_user_recipe_ids(user_ids, relation):
+    """Новые версии множеств id рецептов пользователей после
+    фиксации транзакции.
+
+    Множества не правятся на месте: чтение и запись в кеш не атомарны,
+    а изменения ещё не зафиксированной транзакции могут быть отменены.
+    """
+
+    keys = [
+        VERSION_KEY.format(USER_RECIPES_KEY.format(relation, user_id))
+        for user_id in user_ids
+    ]
+    transaction.on_commit(lambda: cache.set_many(
+        dict.fromkeys(keys, time.time()), timeout=None))
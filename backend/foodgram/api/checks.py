@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Версии наборов данных, токены и закешированные ответы должны
+    быть общими для всех воркеров, поэтому кеш в памяти процесса
+    в боевом окружении не подходит."""
+
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Error(
+        f'Кеш {backend} не общий для воркеров.',
+        hint='Укажите CACHE_BACKEND и CACHE_LOCATION, например memcached.',
+        id='api.E001',
+    )]
+
+
+@register(Tags.async_support, deploy=True)
+def check_persistent_connections(app_configs, **kwargs):
+    """Асинхронные представления выполняют запросы в пуле потоков
+    и после каждого вызова закрывают устаревшие соединения: без
+    CONN_MAX_AGE каждый вызов открывает новое соединение с БД."""
+
+    return [
+        Warning(
+            f'CONN_MAX_AGE базы {alias} равен 0, асинхронные эндпоинты '
+            'будут открывать соединение на каждый запрос к БД.',
+            hint='Укажите CONN_MAX_AGE в .env, например 60.',
+            id='api.W001',
+        )
+        for alias, database in settings.DATABASES.items()
+        if database.get('CONN_MAX_AGE', 0) == 0
+    ]
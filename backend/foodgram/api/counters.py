@@ -0,0 +1,51 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from recipes.models import Recipe
+from users.models import User
+
+
+def change_recipes_count(user_id, delta):
+    """Изменяет счётчик рецептов автора на delta."""
+
+    User.objects.filter(pk=user_id).update(
+        recipes_count=Greatest(F('recipes_count') + delta, 0)
+    )
+
+
+def count_subquery(queryset, field):
+    """Число строк queryset, ссылающихся полем field на текущую запись."""
+
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
+def recount_favorites(recipe_ids=None):
+    """Пересчитывает счётчики избранного одним UPDATE, если передан
+    recipe_ids — только у этих рецептов.
+
+    Строки рецептов сначала блокируются, поэтому счётчик, посчитанный
+    следующим запросом, видит связи параллельных транзакций, которые
+    успели зафиксироваться.
+    """
+
+    favorites_count = count_subquery(
+        Recipe.favorites.through.objects, 'recipe')
+    if recipe_ids is None:
+        return Recipe.objects.update(favorites_count=favorites_count)
+    with transaction.atomic(savepoint=False):
+        locked_ids = list(Recipe.objects.select_for_update().filter(
+            pk__in=recipe_ids).order_by('pk').values_list('pk', flat=True))
+        return Recipe.objects.filter(pk__in=locked_ids).update(
+            favorites_count=favorites_count)
+
+
+def recount_recipes():
+    """Пересчитывает счётчики рецептов авторов одним UPDATE."""
+
+    return User.objects.update(recipes_count=count_subquery(
+        Recipe.objects, 'author'))
@@ -0,0 +1,113 @@
+from django.core.files.storage import default_storage
+from django.db.models import QuerySet
+from django.db.models.fields.files import FieldFile
+
+from api.images import current_variants
+from api.middleware import record_serialization
+
+
+class ValuesSerializer:
+    """Сериализатор только для чтения без дерева полей DRF.
+
+    Словари ответа строятся прямо из строк .values() по списку полей,
+    составленному один раз при создании сериализатора. Поле, для
+    которого есть метод get_<поле>, вычисляется этим методом, значения
+    из extra_values нужны таким методам, но в ответ не попадают.
+    Уже загруженные объекты моделей тоже принимаются.
+    """
+
+    fields = ()
+    extra_values = ()
+
+    def __init__(self, instance=None, many=False, context=None):
+        self.instance = instance
+        self.many = many
+        self.context = context if context is not None else {}
+        self.values = self.values_fields()
+        self.plan = tuple(
+            (name, getattr(self, f'get_{name}', None))
+            for name in self.fields
+        )
+
+    @classmethod
+    def values_fields(cls):
+        return tuple(
+            name for name in cls.fields if not hasattr(cls, f'get_{name}')
+        ) + cls.extra_values
+
+    def to_row(self, obj):
+        row = {}
+        for name in self.values:
+            value = getattr(obj, name)
+            if isinstance(value, FieldFile):
+                value = value.name
+            row[name] = value
+        return row
+
+    def to_representation(self, row):
+        if not isinstance(row, dict):
+            row = self.to_row(row)
+        return {
+            name: method(row) if method else row[name]
+            for name, method in self.plan
+        }
+
+    @property
+    def data(self):
+        if not self.many:
+            with record_serialization():
+                return self.to_representation(self.instance)
+        rows = self.instance
+        if isinstance(rows, QuerySet):
+            rows = list(rows.values(*self.values))
+        with record_serialization():
+            return [self.to_representation(row) for row in rows]
+
+
+class TagValuesSerializer(ValuesSerializer):
+    """То же, что TagSerializer."""
+
+    fields = ('id', 'name', 'color', 'slug')
+
+
+class IngredientValuesSerializer(ValuesSerializer):
+    """То же, что IngredientSerializer."""
+
+    fields = ('id', 'name', 'measurement_unit')
+
+
+class RecipeShortValuesSerializer(ValuesSerializer):
+    """То же, что RecipeShortListSerializer."""
+
+    fields = ('id', 'name', 'image', 'cooking_time')
+    extra_values = ('image', 'image_variants')
+
+    def get_image(self, row):
+        variants = current_variants(row['image'], row['image_variants'])
+        name = variants.get('small', {}).get('webp')
+        if name is None:
+            name = row['image']
+        if not name:
+            return None
+        url = default_storage.url(name)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
+class UserValuesSerializer(ValuesSerializer):
+    """То же, что CustomUserSerializer."""
+
+    fields = ('email', 'id', 'username', 'first_name', 'last_name',
+              'is_subscribed')
+
+    def get_is_subscribed(self, row):
+        request = self.context.get('request')
+        if request is None or request.user.is_anonymous:
+            return False
+        if 'subscriptions' not in self.context:
+            self.context['subscriptions'] = set(
+                request.user.subscriber.values_list('author_id', flat=True)
+            )
+        return row['id'] in self.context['subscriptions']
@@ -0,0 +1,77 @@
+from django.db.models import Q
+
+from foodgram.constants import (FEED_BACKFILL_LIMIT, FEED_BATCH_SIZE,
+                                FEED_FANOUT_LIMIT)
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscription, User
+
+
+def create_feed_entries(subscriber_ids, recipes):
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                subscriber_id=subscriber_id,
+                recipe_id=recipe.id,
+                author_id=recipe.author_id,
+                created=recipe.created,
+            )
+            for subscriber_id in subscriber_ids
+            for recipe in recipes
+        ),
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_recipe(recipe):
+    """Рассылка нового рецепта в ленты подписчиков автора.
+
+    Автор, у которого подписчиков больше FEED_FANOUT_LIMIT, переводится
+    на формирование ленты при чтении, и его рецепты в ленты
+    не копируются.
+    """
+
+    author = recipe.author
+    if not author.fan_out_on_read:
+        subscribers = Subscription.objects.filter(author=author)
+        if subscribers.count() <= FEED_FANOUT_LIMIT:
+            create_feed_entries(
+                subscribers.values_list('subscriber_id', flat=True),
+                (recipe,)
+            )
+            return
+        User.objects.filter(pk=author.pk).update(fan_out_on_read=True)
+
+
+def backfill_feed(subscriber, author):
+    """Последние рецепты автора в ленте нового подписчика."""
+
+    if not author.fan_out_on_read:
+        create_feed_entries(
+            (subscriber.id,),
+            author.recipes.order_by('-created', '-id')[:FEED_BACKFILL_LIMIT]
+        )
+
+
+def prune_feed(subscriber, author):
+    FeedEntry.objects.filter(subscriber=subscriber, author=author).delete()
+
+
+def get_feed(user):
+    """id рецептов ленты пользователя, от новых к старым.
+
+    Если пользователь не подписан на авторов с формированием ленты
+    при чтении, лента читается одним диапазоном индекса записей.
+    """
+
+    entries = FeedEntry.objects.filter(subscriber=user)
+    fan_out_on_read_authors = Subscription.objects.filter(
+        subscriber=user, author__fan_out_on_read=True
+    ).values('author')
+    if not fan_out_on_read_authors.exists():
+        return entries.order_by('-created', '-recipe').values_list(
+            'recipe', flat=True)
+    return Recipe.objects.filter(
+        Q(pk__in=entries.values('recipe'))
+        | Q(author__in=fan_out_on_read_authors)
+    ).order_by('-created', '-id').values_list('pk', flat=True)
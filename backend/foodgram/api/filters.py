@@ -1,19 +1,9 @@
 from django_filters import rest_framework as filters
 from django_filters.rest_framework import FilterSet
 
-from recipes.models import Ingredient, Recipe
-
-
-class IngredientSearchFilter(filters.FilterSet):
-    """Фильтр поиска по названию ингредиента."""
-
-    name = filters.CharFilter(lookup_expr='istartswith')
-
-    class Meta:
-        model = Ingredient
-        fields = (
-            'name',
-        )
+from api.caching import get_user_recipe_ids
+from recipes.models import Recipe
+from .search import search_recipes
 
 
 class RecipeSearchFilter(FilterSet):
@@ -23,6 +13,7 @@ class RecipeSearchFilter(FilterSet):
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Recipe
@@ -33,10 +24,15 @@ class RecipeSearchFilter(FilterSet):
 
     def filter_is_favorited(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
-            return queryset.filter(favorites=self.request.user)
+            return queryset.filter(pk__in=get_user_recipe_ids(
+                self.request.user, 'favorites'))
         return queryset
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
-            return queryset.filter(shopping_cart=self.request.user)
+            return queryset.filter(pk__in=get_user_recipe_ids(
+                self.request.user, 'shopping_cart'))
         return queryset
+
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
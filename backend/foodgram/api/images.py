@@ -0,0 +1,85 @@
+import io
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from PIL import Image, ImageOps
+
+from api.caching import invalidate_responses
+from foodgram.constants import (IMAGE_VARIANT_SIZES, IMAGE_VARIANTS_DIR,
+                                JPEG_QUALITY, WEBP_QUALITY)
+from recipes.models import Recipe
+
+
+def save_variant(image, name, image_format, **options):
+    """Сохранение копии изображения без метаданных в хранилище."""
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def create_variants(recipe_id, image_name):
+    """Уменьшенные копии изображения рецепта в форматах WebP и JPEG."""
+
+    with default_storage.open(image_name) as file:
+        source = ImageOps.exif_transpose(Image.open(file))
+        source.load()
+    if source.mode not in ('RGB', 'RGBA'):
+        source = source.convert('RGBA')
+    variants = {'source': image_name}
+    for variant, size in IMAGE_VARIANT_SIZES:
+        image = source.copy()
+        image.thumbnail((size, size), Image.LANCZOS)
+        name = f'{IMAGE_VARIANTS_DIR}{recipe_id}_{variant}'
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A')
+                         if image.mode == 'RGBA' else None)
+        variants[variant] = {
+            'webp': save_variant(image, f'{name}.webp', 'WEBP',
+                                 quality=WEBP_QUALITY, method=6),
+            'jpeg': save_variant(background, f'{name}.jpg', 'JPEG',
+                                 quality=JPEG_QUALITY, optimize=True,
+                                 progressive=True),
+        }
+    return variants
+
+
+def current_variants(image_name, variants):
+    """Копии изображения, если они сделаны из текущего изображения
+    рецепта. После замены изображения и до конца его обработки
+    копий нет, и отдаётся оригинал."""
+
+    if not image_name or variants.get('source') != image_name:
+        return {}
+    return variants
+
+
+def variant_names(variants):
+    return [
+        name
+        for variant, _ in IMAGE_VARIANT_SIZES
+        for name in variants.get(variant, {}).values()
+    ]
+
+
+def process_recipe_image(recipe_id, image_name, old_variants):
+    """Фоновая обработка изображения рецепта.
+
+    Копии записываются в рецепт, только если его изображение
+    не сменилось за время обработки, копии прежнего изображения
+    удаляются из хранилища.
+    """
+
+    try:
+        variants = create_variants(recipe_id, image_name) if image_name else {}
+        updated = Recipe.objects.filter(
+            pk=recipe_id, image=image_name or None
+        ).update(image_variants=variants)
+        if updated:
+            invalidate_responses('recipes')
+        stale = old_variants if updated else variants
+        for name in variant_names(stale):
+            default_storage.delete(name)
+    finally:
+        connection.close()
@@ -0,0 +1,271 @@
+import json
+import re
+import statistics
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.caching import bump_version
+from foodgram.constants import SEED_PASSWORD, SEED_USERNAME_PREFIX
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+Endpoint = namedtuple(
+    'Endpoint', 'name method url auth budget data remember cold',
+    defaults=(None, None, False))
+
+# Число запросов из заголовка PerformanceMiddleware: он учитывает и запросы
+# асинхронных представлений, выполненные в других потоках, но не запросы
+# при отдаче потокового ответа, которые видны только в CaptureQueriesContext.
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+# PNG 1x1 для создания рецепта.
+BENCHMARK_IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+)
+
+# Запросы выполняются по порядку, поэтому изменяющие запросы идут парами
+# и к следующей итерации возвращают данные в исходное состояние.
+# auth: anonymous - без авторизации, user - токен пользователя seed_data,
+# login - токен, полученный запросом auth-login.
+# data - ключ тела запроса, remember - параметр адреса и поле ответа,
+# в которое он сохраняется, cold - сбросить кеш ответов перед запросом.
+ENDPOINTS = (
+    Endpoint('users-list', 'get', '/api/users/', 'anonymous', 3),
+    Endpoint('users-detail', 'get', '/api/users/{author}/', 'user', 4),
+    Endpoint('users-me', 'get', '/api/users/me/', 'user', 3),
+    Endpoint('users-subscriptions', 'get', '/api/users/subscriptions/',
+             'user', 6),
+    Endpoint('users-subscribe', 'post', '/api/users/{stranger}/subscribe/',
+             'user', 12),
+    Endpoint('users-unsubscribe', 'delete',
+             '/api/users/{stranger}/subscribe/', 'user', 7),
+    Endpoint('tags-list', 'get', '/api/tags/', 'anonymous', 1),
+    Endpoint('tags-detail', 'get', '/api/tags/{tag}/', 'anonymous', 1),
+    Endpoint('ingredients-list', 'get', '/api/ingredients/', 'anonymous', 1),
+    Endpoint('ingredients-search', 'get', '/api/ingredients/?name=ин',
+             'anonymous', 1),
+    Endpoint('ingredients-detail', 'get', '/api/ingredients/{ingredient}/',
+             'anonymous', 1),
+    Endpoint('recipes-list-anonymous', 'get', '/api/recipes/', 'anonymous',
+             6, cold=True),
+    Endpoint('recipes-list-anonymous-cached', 'get', '/api/recipes/',
+             'anonymous', 0),
+    Endpoint('recipes-list', 'get', '/api/recipes/', 'user', 8),
+    Endpoint('recipes-list-cursor', 'get', '/api/recipes/?cursor=', 'user',
+             7),
+    Endpoint('recipes-list-filtered', 'get',
+             '/api/recipes/?tags=breakfast&is_favorited=1', 'user', 9),
+    Endpoint('recipes-search', 'get', '/api/recipes/?search=рецепт', 'user',
+             9),
+    Endpoint('recipes-detail', 'get', '/api/recipes/{recipe}/', 'user', 7),
+    Endpoint('recipes-feed', 'get', '/api/recipes/feed/', 'user', 9),
+    Endpoint('recipes-create', 'post', '/api/recipes/', 'user', 18,
+             data='recipe', remember=('created', 'id')),
+    Endpoint('recipes-update', 'patch', '/api/recipes/{created}/', 'user',
+             14, data='recipe'),
+    Endpoint('recipes-delete', 'delete', '/api/recipes/{created}/', 'user',
+             15),
+    Endpoint('recipes-favorite-add', 'post',
+             '/api/recipes/{recipe}/favorite/', 'user', 8),
+    Endpoint('recipes-favorite-remove', 'delete',
+             '/api/recipes/{recipe}/favorite/', 'user', 7),
+    Endpoint('recipes-favorite-bulk-add', 'post', '/api/recipes/favorite/',
+             'user', 8, data='bulk'),
+    Endpoint('recipes-favorite-bulk-remove', 'delete',
+             '/api/recipes/favorite/', 'user', 8, data='bulk'),
+    Endpoint('recipes-shopping-cart-add', 'post',
+             '/api/recipes/{recipe}/shopping_cart/', 'user', 6),
+    Endpoint('recipes-shopping-cart-remove', 'delete',
+             '/api/recipes/{recipe}/shopping_cart/', 'user', 5),
+    Endpoint('recipes-shopping-cart-bulk-add', 'post',
+             '/api/recipes/shopping_cart/', 'user', 6, data='bulk'),
+    Endpoint('recipes-shopping-cart-bulk-remove', 'delete',
+             '/api/recipes/shopping_cart/', 'user', 6, data='bulk'),
+    Endpoint('recipes-download-shopping-cart', 'get',
+             '/api/recipes/download_shopping_cart/', 'user', 3),
+    Endpoint('recipes-download-shopping-cart-pdf', 'get',
+             '/api/recipes/download_shopping_cart_pdf/', 'user', 3),
+    Endpoint('auth-login', 'post', '/api/auth/token/login/', 'anonymous', 6,
+             data='login', remember=('token', 'auth_token')),
+    Endpoint('auth-logout', 'post', '/api/auth/token/logout/', 'login', 4),
+    Endpoint('async-recipes-list', 'get', '/api/async/recipes/', 'user', 8),
+    Endpoint('async-recipes-detail', 'get', '/api/async/recipes/{recipe}/',
+             'user', 7),
+    Endpoint('async-tags-list', 'get', '/api/async/tags/', 'anonymous', 1),
+    Endpoint('async-tags-detail', 'get', '/api/async/tags/{tag}/',
+             'anonymous', 1),
+    Endpoint('async-ingredients-list', 'get', '/api/async/ingredients/',
+             'anonymous', 1),
+    Endpoint('async-ingredients-detail', 'get',
+             '/api/async/ingredients/{ingredient}/', 'anonymous', 1),
+    Endpoint('async-users-subscriptions', 'get',
+             '/api/async/users/subscriptions/', 'user', 6),
+)
+
+
+def count_queries(response, context):
+    match = SERVER_TIMING_QUERIES.search(response.get('Server-Timing', ''))
+    return max(int(match[1]) if match else 0, len(context))
+
+
+class Command(BaseCommand):
+    """Команда для замера времени ответа и числа SQL-запросов
+    эндпоинтов API на данных, созданных командой seed_data.
+
+    Команда завершается ошибкой, если эндпоинт превысил бюджет
+    SQL-запросов или стал медленнее сохранённого базового замера.
+    """
+
+    help = 'Бенчмарк эндпоинтов API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument(
+            '--baseline', default=str(settings.BASE_DIR / 'benchmark.json'),
+            help='Файл с базовым замером')
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Сохранить результаты как новый базовый замер')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Допустимое замедление относительно базового замера')
+
+    def handle(self, *args, **options):
+        users = list(User.objects.filter(
+            username__startswith=SEED_USERNAME_PREFIX
+        ).order_by('pk')[:2])
+        if len(users) < 2:
+            raise CommandError('Нет данных, сначала выполните seed_data')
+        user, login_user = users
+        author = user.subscriber.values_list('author_id', flat=True).first()
+        stranger = User.objects.exclude(pk=user.pk).exclude(
+            pk__in=user.subscriber.values('author_id')
+        ).values_list('pk', flat=True).first()
+        recipes = list(Recipe.objects.exclude(favorites=user).exclude(
+            shopping_cart=user).values_list('pk', flat=True)[:4])
+        if stranger is None or len(recipes) < 4:
+            raise CommandError('Недостаточно данных, увеличьте параметры '
+                               'seed_data')
+        params = {
+            'author': author or user.pk,
+            'stranger': stranger,
+            'recipe': recipes[0],
+            'tag': Tag.objects.values_list('pk', flat=True).first(),
+            'ingredient': Ingredient.objects.values_list(
+                'pk', flat=True).first(),
+        }
+        payloads = {
+            'recipe': {
+                'name': 'Рецепт бенчмарка',
+                'text': 'Описание рецепта бенчмарка',
+                'cooking_time': 10,
+                'image': BENCHMARK_IMAGE,
+                'tags': [params['tag']],
+                'ingredients': [
+                    {'id': pk, 'amount': 100}
+                    for pk in Ingredient.objects.values_list(
+                        'pk', flat=True)[:5]
+                ],
+            },
+            'bulk': {'recipes': recipes[1:]},
+            'login': {'email': login_user.email, 'password': SEED_PASSWORD},
+        }
+        token, _ = Token.objects.get_or_create(user=user)
+        host = next(
+            (host for host in settings.ALLOWED_HOSTS if host != '*'),
+            'localhost').lstrip('.')
+        clients = {
+            auth: APIClient(HTTP_HOST=host)
+            for auth in ('anonymous', 'user', 'login')
+        }
+        clients['user'].credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        timings = {endpoint.name: [] for endpoint in ENDPOINTS}
+        queries = dict.fromkeys(timings, 0)
+        # Первый проход прогревает кеши и в замер не попадает.
+        for iteration in range(options['iterations'] + 1):
+            for endpoint in ENDPOINTS:
+                if endpoint.cold:
+                    bump_version('recipes')
+                if endpoint.auth == 'login':
+                    clients['login'].credentials(
+                        HTTP_AUTHORIZATION=f'Token {params["token"]}')
+                request = getattr(clients[endpoint.auth], endpoint.method)
+                kwargs = {}
+                if endpoint.data:
+                    kwargs = {
+                        'data': payloads[endpoint.data], 'format': 'json'}
+                with CaptureQueriesContext(connection) as context:
+                    started = time.perf_counter()
+                    response = request(endpoint.url.format(**params), **kwargs)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                    elapsed = time.perf_counter() - started
+                if response.status_code >= 400:
+                    raise CommandError(
+                        f'{endpoint.name}: статус {response.status_code}')
+                if endpoint.remember:
+                    param, field = endpoint.remember
+                    params[param] = response.json()[field]
+                if not iteration:
+                    continue
+                timings[endpoint.name].append(elapsed * 1000)
+                queries[endpoint.name] = max(
+                    queries[endpoint.name], count_queries(response, context))
+        results = {
+            name: {
+                'median_ms': round(statistics.median(values), 3),
+                'p95_ms': round(sorted(values)[
+                    int(len(values) * 0.95) - 1], 3),
+                'queries': queries[name],
+            }
+            for name, values in timings.items()
+        }
+        self.report(results, options)
+
+    def report(self, results, options):
+        baseline = {}
+        if not options['save_baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as file:
+                    baseline = json.load(file)
+            except FileNotFoundError:
+                pass
+        failures = []
+        self.stdout.write(
+            f'{"эндпоинт":<36}{"медиана, мс":>12}{"p95, мс":>10}'
+            f'{"запросы":>9}{"бюджет":>8}'
+        )
+        for endpoint in ENDPOINTS:
+            name, budget = endpoint.name, endpoint.budget
+            result = results[name]
+            self.stdout.write(
+                f'{name:<36}{result["median_ms"]:>12.2f}'
+                f'{result["p95_ms"]:>10.2f}{result["queries"]:>9}'
+                f'{budget:>8}'
+            )
+            if result['queries'] > budget:
+                failures.append(
+                    f'{name}: {result["queries"]} SQL-запросов '
+                    f'при бюджете {budget}')
+            base = baseline.get(name)
+            limit = base and base['median_ms'] * (1 + options['tolerance'])
+            if limit and result['median_ms'] > limit:
+                failures.append(
+                    f'{name}: {result["median_ms"]} мс, базовый замер '
+                    f'{base["median_ms"]} мс')
+        if options['save_baseline']:
+            with open(options['baseline'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+            self.stdout.write(
+                f'Базовый замер сохранён в {options["baseline"]}')
+        if failures:
+            raise CommandError('\n'.join(failures))
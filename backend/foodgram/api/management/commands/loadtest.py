@@ -0,0 +1,63 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+PATHS = (
+    'recipes/',
+    'recipes/?limit=20',
+    'tags/',
+    'ingredients/?name=мука',
+    'users/subscriptions/',
+)
+
+
+class Command(BaseCommand):
+    """Команда для сравнения пропускной способности синхронных
+    эндпоинтов /api/ и асинхронных /api/async/ на запущенном сервере.
+
+    Сервер запускается отдельно с одинаковым числом воркеров, например
+    gunicorn -w 4 foodgram.wsgi и
+    gunicorn -w 4 -k uvicorn.workers.UvicornWorker foodgram.asgi.
+    """
+
+    help = 'Нагрузочный тест синхронных и асинхронных эндпоинтов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Адрес сервера, например '
+                                        'http://localhost:8000')
+        parser.add_argument('--token', default='',
+                            help='Токен для авторизованных запросов')
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=50)
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+        self.stdout.write(
+            f'{"эндпоинт":<28}{"/api/, rps":>14}{"/api/async/, rps":>18}')
+        for path in PATHS:
+            results = [
+                self.run(f'{options["url"].rstrip("/")}/{prefix}{path}',
+                         headers, options['requests'],
+                         options['concurrency'])
+                for prefix in ('api/', 'api/async/')
+            ]
+            self.stdout.write(
+                f'{path:<28}{results[0]:>14.1f}{results[1]:>18.1f}')
+
+    def run(self, url, headers, requests, concurrency):
+        def fetch(_):
+            try:
+                with urlopen(Request(url, headers=headers)) as response:
+                    response.read()
+            except HTTPError as error:
+                raise CommandError(f'{url}: статус {error.code}')
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(fetch, range(requests)))
+        return requests / (time.perf_counter() - started)
@@ -0,0 +1,159 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from foodgram.constants import METRICS_BUCKETS, METRICS_FLUSH_INTERVAL
+
+from .caching import get_cache_events, increment
+
+METRICS_KEY = 'metrics:{}:{}:{}:{}'
+METRICS_LABELS_KEY = 'metrics:labels'
+# В кеше время хранится в микросекундах: cache.incr работает с целыми.
+MICROSECONDS = 1_000_000
+FIELDS = ('count', 'sum', 'queries', 'db_sum', 'render_sum',
+          'serialize_sum')
+TIME_FIELDS = ('sum', 'db_sum', 'render_sum', 'serialize_sum')
+BUCKET_FIELDS = tuple(f'bucket{index}' for index in range(
+    len(METRICS_BUCKETS)))
+
+METRICS = (
+    ('foodgram_request_queries_total', 'counter',
+     'Число SQL-запросов', 'queries'),
+    ('foodgram_request_db_seconds_total', 'counter',
+     'Время выполнения SQL-запросов', 'db_sum'),
+    ('foodgram_request_serialize_seconds_total', 'counter',
+     'Время сериализации данных ответа', 'serialize_sum'),
+    ('foodgram_request_render_seconds_total', 'counter',
+     'Время рендеринга ответа в JSON', 'render_sum'),
+)
+CACHE_EVENTS = {
+    'hits': 'Ответы из общего кеша',
+    'misses': 'Ответы, собранные заново',
+    'invalidations': 'Сбросы закешированных ответов',
+}
+
+_lock = threading.Lock()
+_pending = defaultdict(int)
+_flushed_labels = set()
+_flushed_at = time.monotonic()
+
+
+def observe(view, method, status, duration, queries, db_time, render_time,
+            serialize_time):
+    """Учитывает запрос в гистограмме представления.
+
+    Значения копятся в процессе и не реже раза в METRICS_FLUSH_INTERVAL
+    секунд добавляются к счётчикам в общем кеше, поэтому /metrics
+    любого процесса отдаёт данные всех воркеров.
+    """
+    global _flushed_at
+    labels = (view, method, f'{status // 100}xx')
+    index = bisect_left(METRICS_BUCKETS, duration)
+    with _lock:
+        if index < len(METRICS_BUCKETS):
+            _pending[labels, BUCKET_FIELDS[index]] += 1
+        _pending[labels, 'count'] += 1
+        _pending[labels, 'queries'] += queries
+        for field, seconds in (
+            ('sum', duration),
+            ('db_sum', db_time),
+            ('render_sum', render_time),
+            ('serialize_sum', serialize_time),
+        ):
+            _pending[labels, field] += round(seconds * MICROSECONDS)
+        now = time.monotonic()
+        if now - _flushed_at < METRICS_FLUSH_INTERVAL:
+            return
+        _flushed_at = now
+    flush_metrics()
+
+
+def flush_metrics():
+    """Переносит накопленные в процессе значения в общий кеш."""
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+    for (labels, field), value in pending.items():
+        if value:
+            increment(METRICS_KEY.format(*labels, field), value)
+    _flushed_labels.update(labels for labels, _ in pending)
+    register_labels()
+
+
+def register_labels():
+    """Наборы меток хранятся в кеше одним списком: ключи кеша нельзя
+    перебрать. Процесс сверяет с ним свои метки при каждом сбросе,
+    поэтому метки, потерянные при одновременной записи из нескольких
+    процессов или вытеснении из кеша, возвращаются в список."""
+    known = cache.get(METRICS_LABELS_KEY, set())
+    if not _flushed_labels <= known:
+        cache.set(METRICS_LABELS_KEY, known | _flushed_labels, timeout=None)
+
+
+def _labels(view, method, status, **extra):
+    labels = {'view': view, 'method': method, 'status': status, **extra}
+    return ','.join(f'{key}="{value}"' for key, value in labels.items())
+
+
+def render_metrics():
+    """Возвращает накопленные метрики в текстовом формате Prometheus."""
+    flush_metrics()
+    labels = sorted(cache.get(METRICS_LABELS_KEY, set()))
+    keys = {
+        (key, field): METRICS_KEY.format(*key, field)
+        for key in labels for field in FIELDS + BUCKET_FIELDS
+    }
+    values = cache.get_many(keys.values())
+    histograms = {}
+    for (key, field), cache_key in keys.items():
+        value = values.get(cache_key, 0)
+        if field in TIME_FIELDS:
+            value /= MICROSECONDS
+        histograms.setdefault(key, {})[field] = value
+    lines = [
+        '# HELP foodgram_request_duration_seconds Время обработки запроса',
+        '# TYPE foodgram_request_duration_seconds histogram',
+    ]
+    for key, histogram in histograms.items():
+        cumulative = 0
+        for bound, field in zip(METRICS_BUCKETS, BUCKET_FIELDS):
+            cumulative += histogram[field]
+            lines.append(
+                'foodgram_request_duration_seconds_bucket'
+                f'{{{_labels(*key, le=bound)}}} {cumulative}'
+            )
+        lines.append(
+            'foodgram_request_duration_seconds_bucket'
+            f'{{{_labels(*key, le="+Inf")}}} {histogram["count"]}'
+        )
+        lines.append(
+            f'foodgram_request_duration_seconds_sum{{{_labels(*key)}}} '
+            f'{histogram["sum"]}'
+        )
+        lines.append(
+            f'foodgram_request_duration_seconds_count{{{_labels(*key)}}} '
+            f'{histogram["count"]}'
+        )
+    for name, metric_type, description, field in METRICS:
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for key, histogram in histograms.items():
+            lines.append(f'{name}{{{_labels(*key)}}} {histogram[field]}')
+    for event, count in get_cache_events().items():
+        name = f'foodgram_response_cache_{event}_total'
+        lines.append(f'# HELP {name} {CACHE_EVENTS[event]}')
+        lines.append(f'# TYPE {name} counter')
+        lines.append(f'{name} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics(request):
+    """Эндпоинт метрик для Prometheus."""
+    return HttpResponse(
+        render_metrics(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from foodgram.constants import SLOW_REQUEST_MS, SLOW_REQUEST_QUERIES
+
+from .metrics import observe
+
+logger = logging.getLogger(__name__)
+current_recorder = ContextVar('current_recorder', default=None)
+serializing = ContextVar('serializing', default=False)
+
+
+class QueryRecorder:
+    """Обёртка над выполнением SQL, считающая число и время запросов,
+    а также время сериализации данных ответа."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.queries = []
+        self.serialize_duration = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            with self._lock:
+                self.count += 1
+                self.duration += duration
+                self.queries.append((duration, sql))
+
+    def add_serialization(self, duration):
+        with self._lock:
+            self.serialize_duration += duration
+
+    def slowest(self):
+        return sorted(self.queries, reverse=True)[:SLOW_REQUEST_QUERIES]
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка выполнения SQL, которую получает каждое соединение.
+
+    Запрос учитывается в счётчике обрабатываемого запроса из контекстной
+    переменной, поэтому в счётчик попадают и запросы синхронных
+    представлений под ASGI, и запросы из потоков sync_to_async.
+    """
+
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+@contextmanager
+def record_serialization():
+    """Учитывает время сериализации в счётчике обрабатываемого запроса.
+
+    Время вложенных сериализаторов уже входит во время внешнего
+    и повторно не учитывается.
+    """
+
+    recorder = current_recorder.get()
+    if recorder is None or serializing.get():
+        yield
+        return
+    token = serializing.set(True)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add_serialization(time.perf_counter() - started)
+        serializing.reset(token)
+
+
+def get_view_name(view_func, method):
+    """Возвращает имя представления, для вьюсетов DRF — с действием."""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    actions = getattr(view_func, 'actions', None)
+    if not actions:
+        return view_class.__name__
+    return f'{view_class.__name__}.{actions.get(method.lower(), method)}'
+
+
+class PerformanceMiddleware:
+    """Замеряет время обработки запроса, число и время SQL-запросов,
+    время сериализации данных ответа и рендеринга их в JSON.
+
+    Результат отдаётся в заголовке Server-Timing, накапливается
+    в гистограммах для /metrics, а медленные запросы пишутся в лог
+    вместе с самыми долгими SQL-запросами.
+
+    SQL-запросы учитываются обёрткой record_query, которая ставится
+    на каждое соединение в любом потоке при его открытии.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        request._render_time = 0.0
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        request._render_time = 0.0
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    def finish(self, request, response, recorder, started):
+        duration = time.perf_counter() - started
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={recorder.duration * 1000:.1f};'
+            f'desc="{recorder.count} queries"',
+            f'serialize;dur={recorder.serialize_duration * 1000:.1f}',
+            f'render;dur={request._render_time * 1000:.1f}',
+            f'total;dur={duration * 1000:.1f}',
+        ))
+        view = getattr(request, '_performance_view', None)
+        if view is not None:
+            observe(view, request.method, response.status_code, duration,
+                    recorder.count, recorder.duration, request._render_time,
+                    recorder.serialize_duration)
+        if duration * 1000 >= SLOW_REQUEST_MS:
+            logger.warning(
+                'Медленный запрос %s %s: %.0f мс, SQL-запросов %d (%.0f мс)'
+                '\n%s',
+                request.method, request.get_full_path(), duration * 1000,
+                recorder.count, recorder.duration * 1000,
+                '\n'.join(
+                    f'{query_time * 1000:.1f} мс: {sql}'
+                    for query_time, sql in recorder.slowest()
+                ),
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._performance_view = get_view_name(view_func, request.method)
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+
+        def finish_render(response):
+            request._render_time = time.perf_counter() - started
+
+        response.add_post_render_callback(finish_render)
+        return response
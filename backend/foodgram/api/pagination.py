@@ -1,6 +1,118 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from datetime import datetime
 
-from foodgram.constants import MAX_PAGE_SIZE
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (LimitOffsetPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from foodgram.constants import APPROXIMATE_COUNT_THRESHOLD, MAX_PAGE_SIZE
+
+
+def estimate_count(queryset):
+    """Оценка числа строк запроса по статистике планировщика PostgreSQL,
+    для других СУБД оценка недоступна."""
+
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Plan Rows']
+
+
+def get_count(queryset):
+    """Число объектов и признак того, что оно приблизительное.
+
+    Оценка планировщика берётся только для выборок без фильтров:
+    для отфильтрованных она бывает далека от истины. Точный COUNT(*)
+    выполняется и тогда, когда по оценке в выборке не больше
+    APPROXIMATE_COUNT_THRESHOLD строк.
+    """
+
+    if not isinstance(queryset, QuerySet):
+        return len(queryset), False
+    if queryset.query.where:
+        return queryset.count(), False
+    estimate = estimate_count(queryset)
+    if estimate is not None and estimate > APPROXIMATE_COUNT_THRESHOLD:
+        return int(estimate), True
+    return queryset.count(), False
+
+
+def correct_count(count, known, has_next):
+    """Уточнение приблизительного числа объектов по выбранной странице.
+
+    known — число объектов до конца страницы. Если следующей страницы
+    нет, число становится точным, если есть, оно не меньше known + 1.
+    Возвращает число и признак того, что оно осталось приблизительным.
+    """
+
+    if not has_next:
+        return known, False
+    return max(count, known + 1), True
+
+
+class ApproximateCountPaginator(Paginator):
+    """Paginator, который для больших выборок берёт оценку
+    числа объектов вместо COUNT(*).
+
+    Страница выбирается с одной лишней строкой, поэтому наличие
+    следующей страницы не зависит от оценки, а номер страницы
+    с оценкой не сверяется.
+    """
+
+    count_is_approximate = False
+
+    @cached_property
+    def count(self):
+        count, self.count_is_approximate = get_count(self.object_list)
+        return count
+
+    def validate_number(self, number):
+        if not (self.count and self.count_is_approximate):
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы не является целым числом')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self.page_from_rows(
+            list(self.object_list[bottom:bottom + self.per_page + 1]),
+            number
+        )
+
+    def page_from_rows(self, rows, number):
+        """Страница из строк, выбранных с одной лишней строкой."""
+
+        number = self.validate_number(number)
+        if not self.count_is_approximate:
+            return self._get_page(rows[:self.per_page], number, self)
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not rows and number > 1:
+            raise EmptyPage('На этой странице нет результатов')
+        self.count, self.count_is_approximate = correct_count(
+            self.count, (number - 1) * self.per_page + len(rows), has_next)
+        self.__dict__.pop('num_pages', None)
+        return self._get_page(rows, number, self)
 
 
 class LimitPagePagination(PageNumberPagination):
@@ -8,3 +120,157 @@ class LimitPagePagination(PageNumberPagination):
 
     page_size = MAX_PAGE_SIZE
     page_size_query_param = 'limit'
+    django_paginator_class = ApproximateCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_is_approximate',
+             self.page.paginator.count_is_approximate),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+
+class LimitOffsetApproximatePagination(LimitOffsetPagination):
+    """Выборка по limit и offset с приблизительным числом объектов
+    для больших выборок.
+
+    Строки выбираются с одной лишней строкой, поэтому ссылка на
+    следующую страницу не зависит от оценки числа объектов.
+    """
+
+    count_is_approximate = False
+
+    def get_count(self, queryset):
+        count, self.count_is_approximate = get_count(queryset)
+        return count
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.count = self.get_count(queryset)
+        rows = self.page_from_rows(
+            list(queryset[self.offset:self.offset + self.limit + 1]))
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+        return rows
+
+    def page_from_rows(self, rows):
+        """Строки страницы из строк, выбранных с одной лишней строкой."""
+
+        has_next = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if not self.count_is_approximate:
+            return rows
+        if rows or not self.offset:
+            self.count, self.count_is_approximate = correct_count(
+                self.count, self.offset + len(rows), has_next)
+        else:
+            self.count = min(self.count, self.offset)
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('count_is_approximate', self.count_is_approximate),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+
+class RecipePagination(LimitPagePagination):
+    """Постраничный вывод рецептов.
+
+    С параметром cursor страницы выбираются по ключу (created, id)
+    без COUNT и OFFSET, поэтому дальние страницы обходятся так же,
+    как первая. Пустой cursor открывает первую страницу.
+    """
+
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+    keyset = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = (
+            self.cursor_query_param in request.query_params
+            and not queryset.query.order_by
+        )
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        page_size = self.get_page_size(request)
+        reverse, position = self.decode_cursor(request)
+        if position is None:
+            page = list(queryset.order_by('created', 'id')[:page_size + 1])
+        elif reverse:
+            created, pk = position
+            page = list(queryset.filter(
+                Q(created__lt=created) | Q(created=created, id__lt=pk)
+            ).order_by('-created', '-id')[:page_size + 1])
+        else:
+            created, pk = position
+            page = list(queryset.filter(
+                Q(created__gt=created) | Q(created=created, id__gt=pk)
+            ).order_by('created', 'id')[:page_size + 1])
+        has_more = len(page) > page_size
+        page = page[:page_size]
+        if reverse:
+            page.reverse()
+            has_next, has_previous = position is not None, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+        self.next_position = (
+            (page[-1].created, page[-1].id) if page and has_next else None)
+        self.previous_position = (
+            (page[0].created, page[0].id) if page and has_previous else None)
+        return page
+
+    def decode_cursor(self, request):
+        cursor = request.query_params[self.cursor_query_param]
+        if not cursor:
+            return False, None
+        try:
+            direction, created, pk = urlsafe_b64decode(
+                cursor.encode()).decode().split('|')
+            return direction == 'p', (datetime.fromisoformat(created),
+                                      int(pk))
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, direction, position):
+        created, pk = position
+        cursor = urlsafe_b64encode(
+            f'{direction}|{created.isoformat()}|{pk}'.encode()).decode()
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        return self.encode_cursor('n', self.next_position)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor('p', self.previous_position)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', None),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
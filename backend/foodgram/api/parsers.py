@@ -0,0 +1,31 @@
+import re
+from io import BytesIO
+
+import orjson
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+# orjson читает целые числа больше 64 бит как float, а json - как int.
+LONG_NUMBER = re.compile(rb'\d{19}')
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser на orjson.
+
+    Тело в кодировке, отличной от UTF-8, тело с длинными числами
+    и тело, которое orjson не разобрал, передаются стандартному
+    JSONParser, чтобы результат и текст ошибки совпадали с DRF.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if encoding.lower().replace('-', '') != 'utf8' or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+        data = stream.read()
+        try:
+            if not LONG_NUMBER.search(data):
+                return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+        return super().parse(BytesIO(data), media_type, parser_context)
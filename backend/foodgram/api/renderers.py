@@ -0,0 +1,38 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson с тем же выводом, что и у DRF.
+
+    Типы, которые orjson не знает или выводит иначе (Decimal, дата
+    и время, ленивые строки), передаются в JSONEncoder DRF. Вывод
+    с отступами, с ensure_ascii и данные, которые orjson не может
+    закодировать, например числа больше 64 бит, рендерит
+    стандартный JSONRenderer.
+
+    Отличия от JSONRenderer: числа с плавающей точкой в экспоненциальной
+    записи выводятся в другом виде (1e16 вместо 1e+16), NaN
+    и бесконечности выводятся как null. Сериализаторы проекта таких
+    чисел не выдают.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        # Как и DRF, экранируем U+2028 и U+2029 для совместимости с JS.
+        return ret.replace(
+            '\u2028'.encode(), b'\\u2028').replace(
+            '\u2029'.encode(), b'\\u2029')
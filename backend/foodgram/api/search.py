@@ -0,0 +1,97 @@
+import threading
+from bisect import bisect_left
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            TrigramSimilarity)
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, When
+
+from foodgram.constants import SEARCH_CONFIG
+from recipes.models import RECIPE_SEARCH_VECTOR, Ingredient
+from .caching import get_version
+
+PREFIX_UPPER_BOUND = '\U0010ffff'
+
+
+class IngredientIndex:
+    """Отсортированный индекс ингредиентов в памяти процесса.
+
+    Индекс строится при первом запросе и перестраивается, когда
+    меняется версия ингредиентов в общем кеше, поиск по нему
+    не обращается к БД.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._keys = None
+        self._rows = None
+
+    def _build(self):
+        rows = sorted(
+            Ingredient.objects.values('id', 'name', 'measurement_unit'),
+            key=lambda row: (row['name'].casefold(), row['id'])
+        )
+        return [row['name'].casefold() for row in rows], rows
+
+    def _get(self):
+        version = get_version('ingredients')
+        with self._lock:
+            if self._version != version:
+                self._keys, self._rows = self._build()
+                self._version = version
+            return self._keys, self._rows
+
+    def search(self, query):
+        """Ингредиенты, название которых начинается с query,
+        а за ними ингредиенты, содержащие query в середине названия."""
+
+        keys, rows = self._get()
+        query = query.casefold()
+        start = bisect_left(keys, query)
+        end = bisect_left(keys, query + PREFIX_UPPER_BOUND, start)
+        return rows[start:end] + [
+            row for key, row in zip(keys, rows)
+            if query in key and not key.startswith(query)
+        ]
+
+
+ingredient_index = IngredientIndex()
+
+
+def search_recipes_postgres(queryset, value):
+    """Полнотекстовый поиск по названию и описанию рецепта
+    с учётом опечаток в названии, оба условия используют GIN-индексы."""
+
+    query = SearchQuery(value, config=SEARCH_CONFIG,
+                        search_type='websearch')
+    return queryset.alias(
+        search=RECIPE_SEARCH_VECTOR,
+    ).annotate(
+        rank=(SearchRank(RECIPE_SEARCH_VECTOR, query)
+              + TrigramSimilarity('name', value)),
+    ).filter(
+        Q(search=query) | Q(name__trigram_similar=value)
+    ).order_by('-rank', '-created', '-id')
+
+
+def search_recipes_fallback(queryset, value):
+    """Поиск по вхождению подстроки для СУБД без полнотекстового
+    поиска, совпадения в названии выводятся первыми."""
+
+    return queryset.filter(
+        Q(name__icontains=value) | Q(text__icontains=value)
+    ).annotate(
+        rank=Case(
+            When(name__istartswith=value, then=2),
+            When(name__icontains=value, then=1),
+            default=0,
+            output_field=IntegerField(),
+        )
+    ).order_by('-rank', '-created', '-id')
+
+
+def search_recipes(queryset, value):
+    if connection.vendor == 'postgresql':
+        return search_recipes_postgres(queryset, value)
+    return search_recipes_fallback(queryset, value)
@@ -2,24 +2,63 @@ import base64
 
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.core.files.base import ContentFile
-from django.db import IntegrityError
-from django.db.models import F
-from django.shortcuts import get_object_or_404
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from rest_framework.validators import UniqueTogetherValidator
 
-from foodgram.constants import (MAX_LENGTH, MAX_LENGTH_USER, MAX_VALUE,
-                                MIN_VALUE, RECIPES_LIMIT)
+from api.caching import get_user_recipe_ids
+from api.fast_serializers import (RecipeShortValuesSerializer,
+                                  TagValuesSerializer, UserValuesSerializer)
+from api.images import current_variants
+from api.middleware import record_serialization
+from foodgram.constants import (BULK_RECIPES_LIMIT, MAX_LENGTH,
+                                MAX_LENGTH_USER, MAX_VALUE, MIN_VALUE)
 from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
 from users.models import Subscription, User
 from users.validators import validate_username
 
 
-class RecipeShortListSerializer(serializers.ModelSerializer):
+class TimedSerializerMixin:
+    """Время to_representation попадает в замер сериализации
+    ответа PerformanceMiddleware."""
+
+    def to_representation(self, instance):
+        with record_serialization():
+            return super().to_representation(instance)
+
+
+class ImageVariantField(serializers.ImageField):
+    """Ссылка на уменьшенную копию изображения рецепта,
+    пока копии не готовы — на оригинал."""
+
+    def __init__(self, variant, image_format='webp', **kwargs):
+        self.variant = variant
+        self.image_format = image_format
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        variants = current_variants(recipe.image.name, recipe.image_variants)
+        name = variants.get(self.variant, {}).get(self.image_format)
+        if name is None:
+            return super().to_representation(recipe.image)
+        url = default_storage.url(name)
+        request = self.context.get('request', None)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
+class RecipeShortListSerializer(TimedSerializerMixin,
+                                serializers.ModelSerializer):
     """Сериализатор для компактного отображения рецепта."""
 
+    image = ImageVariantField('small')
+
     class Meta:
         model = Recipe
         fields = (
@@ -71,7 +110,7 @@ class CustomUserCreateSerializer(UserCreateSerializer):
         return data
 
 
-class CustomUserSerializer(UserSerializer):
+class CustomUserSerializer(TimedSerializerMixin, UserSerializer):
     """Сериализатор для проверки подписки пользователя."""
 
     is_subscribed = serializers.SerializerMethodField(read_only=True)
@@ -93,9 +132,11 @@ class CustomUserSerializer(UserSerializer):
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
-        return object.author.filter(
-            subscriber=request.user
-        ).exists()
+        if 'subscriptions' not in self.context:
+            self.context['subscriptions'] = set(
+                request.user.subscriber.values_list('author_id', flat=True)
+            )
+        return object.id in self.context['subscriptions']
 
 
 class SubscriptionSerializer(serializers.ModelSerializer):
@@ -128,7 +169,7 @@ class SubscriptionShowSerializer(CustomUserSerializer):
     """Сериализатор отображения подписок."""
 
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
@@ -143,28 +184,13 @@ class SubscriptionShowSerializer(CustomUserSerializer):
             'recipes_count'
         )
 
-    def to_representation(self, instance):
-        rep = super().to_representation(instance)
-        request = self.root.context.get('request')
-        if request is not None:
-            count = request.query_params.get('recipes_limit')
-        else:
-            count = self.root.context.get('recipes_limit')
-        if count is not None:
-            rep['recipes'] = rep['recipes'][:int(count)]
-        return rep
-
     def get_recipes(self, object):
-        author_recipes = object.recipes.all()[:RECIPES_LIMIT]
-        return RecipeShortListSerializer(
-            author_recipes, many=True
+        return RecipeShortValuesSerializer(
+            object.latest_recipes, many=True
         ).data
 
-    def get_recipes_count(self, object):
-        return object.recipes.count()
-
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для тегов."""
 
     class Meta:
@@ -181,7 +207,8 @@ class TagSerializer(serializers.ModelSerializer):
         )
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin,
+                           serializers.ModelSerializer):
     """Сериализатор для ингридиентов."""
 
     class Meta:
@@ -209,6 +236,16 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         )
 
 
+class RecipeIdsSerializer(serializers.Serializer):
+    """Сериализатор списка id рецептов для массовых операций."""
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=MIN_VALUE),
+        allow_empty=False,
+        max_length=BULK_RECIPES_LIMIT,
+    )
+
+
 class Base64ImageField(serializers.ImageField):
     """Сериализатор для поля картинки в формате Base64."""
 
@@ -222,7 +259,8 @@ class Base64ImageField(serializers.ImageField):
         return super().to_internal_value(data)
 
 
-class RecipeCreateSerializer(serializers.ModelSerializer):
+class RecipeCreateSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
     """Сериализатор для создания рецепта."""
 
     name = serializers.CharField(max_length=MAX_LENGTH)
@@ -236,7 +274,8 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        exclude = ('favorites', 'shopping_cart')
+        exclude = ('favorites', 'shopping_cart', 'image_variants',
+                   'favorites_count')
 
     def validate(self, data):
         """Проверка на обновление рецепта
@@ -253,7 +292,8 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         return data
 
     def validate_ingredients(self, value):
-        """Проверка на создание рецепта без поля и уникальности ингредиента"""
+        """Проверка на создание рецепта без поля, уникальности
+        и существования ингредиентов одним запросом"""
 
         if not value:
             raise serializers.ValidationError(
@@ -264,6 +304,14 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 ('Ингредиенты не должны повторяться.')
             )
+        ingredients = Ingredient.objects.in_bulk(ingredients_ids)
+        missing_ids = [pk for pk in ingredients_ids if pk not in ingredients]
+        if missing_ids:
+            raise serializers.ValidationError(
+                (f'Ингредиентов с id {missing_ids} не существует.')
+            )
+        for ingredient in value:
+            ingredient['ingredient'] = ingredients[ingredient['id']]
         return value
 
     def validate_tags(self, value):
@@ -285,9 +333,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             RecipeIngredient.objects.bulk_create(
                 RecipeIngredient(
                     recipe=recipe,
-                    ingredient=get_object_or_404(
-                        Ingredient, id=ingredient['id']
-                    ),
+                    ingredient=ingredient['ingredient'],
                     amount=ingredient['amount'],
                 )
                 for ingredient in ingredients
@@ -297,34 +343,63 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
                 (f'Ошибка при добавлении ингредиента: {error}')
             )
 
+    def update_ingredients(self, recipe, ingredients):
+        """Обновление ингредиентов рецепта: изменяются, добавляются
+        и удаляются только строки, которые действительно поменялись"""
+
+        current = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in recipe.recipe_ingredient.all()
+        }
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        changed = []
+        for ingredient_id, recipe_ingredient in current.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and amount != recipe_ingredient.amount:
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+        RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        removed_ids = current.keys() - amounts.keys()
+        if removed_ids:
+            RecipeIngredient.objects.filter(
+                recipe=recipe, ingredient_id__in=removed_ids
+            ).delete()
+        self.add_ingredients(recipe, [
+            ingredient for ingredient in ingredients
+            if ingredient['id'] not in current
+        ])
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
         self.add_ingredients(recipe, ingredients)
-        recipe.save()
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
         super().update(instance, validated_data)
-        instance.ingredients.clear()
         instance.tags.set(tags)
-        self.add_ingredients(instance, ingredients)
-        instance.save()
+        self.update_ingredients(instance, ingredients)
         return instance
 
 
 class RecipeSerializer(RecipeCreateSerializer):
     """Сериализатор получения созданного рецепта"""
 
-    tags = TagSerializer(read_only=True, many=True)
+    tags = serializers.SerializerMethodField()
     ingredients = serializers.SerializerMethodField()
     name = serializers.CharField(max_length=MAX_LENGTH)
-    author = CustomUserSerializer(read_only=True)
+    author = serializers.SerializerMethodField()
     image = Base64ImageField(allow_null=True)
+    image_variants = serializers.SerializerMethodField(read_only=True)
     is_favorited = serializers.SerializerMethodField(read_only=True)
     is_in_shopping_cart = serializers.SerializerMethodField(read_only=True)
 
@@ -338,26 +413,67 @@ class RecipeSerializer(RecipeCreateSerializer):
             'text',
             'cooking_time',
             'image',
+            'image_variants',
             'author',
             'is_favorited',
             'is_in_shopping_cart'
         )
 
+    def get_tags(self, obj):
+        return TagValuesSerializer(list(obj.tags.all()), many=True).data
+
+    def get_author(self, obj):
+        """Автор сериализуется без дерева полей DRF,
+        множество подписок общее для всего списка."""
+
+        if not hasattr(self, 'author_serializer'):
+            self.author_serializer = UserValuesSerializer(
+                context=self.context)
+        return self.author_serializer.to_representation(obj.author)
+
     def get_ingredients(self, obj):
-        return obj.ingredients.values(
-            'id',
-            'name',
-            'measurement_unit',
-            amount=F('recipes_ingredients__amount'))
+        return [
+            {
+                'id': recipe_ingredient.ingredient.id,
+                'name': recipe_ingredient.ingredient.name,
+                'measurement_unit': (
+                    recipe_ingredient.ingredient.measurement_unit),
+                'amount': recipe_ingredient.amount,
+            }
+            for recipe_ingredient in obj.recipe_ingredient.all()
+        ]
+
+    def get_image_variants(self, obj):
+        """Ссылки на уменьшенные копии изображения по размерам
+        и форматам."""
+
+        request = self.context.get('request')
+        return {
+            variant: {
+                image_format: request.build_absolute_uri(
+                    default_storage.url(name))
+                for image_format, name in formats.items()
+            }
+            for variant, formats in current_variants(
+                obj.image.name, obj.image_variants).items()
+            if variant != 'source'
+        }
+
+    def get_user_recipe_ids(self, relation):
+        """Множество id рецептов пользователя загружается
+        из кеша один раз на весь сериализуемый список."""
+
+        if relation not in self.context:
+            self.context[relation] = get_user_recipe_ids(
+                self.context.get('request').user, relation)
+        return self.context[relation]
 
     def get_is_favorited(self, obj):
-        user = self.context.get('request').user
-        if user.is_authenticated:
-            return user.favorites.filter(pk=obj.pk).exists()
+        if self.context.get('request').user.is_authenticated:
+            return obj.pk in self.get_user_recipe_ids('favorites')
         return False
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.context.get('request').user
-        if user.is_authenticated:
-            return user.shopping_cart.filter(pk=obj.pk).exists()
+        if self.context.get('request').user.is_authenticated:
+            return obj.pk in self.get_user_recipe_ids('shopping_cart')
         return False
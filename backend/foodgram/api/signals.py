@@ -0,0 +1,183 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import User
+from .authentication import forget_tokens
+from .caching import (bump_version, forget_user_recipe_ids,
+                      invalidate_responses)
+from .counters import change_recipes_count, recount_favorites
+from .images import process_recipe_image
+from .middleware import record_query
+from .tasks import run_once
+
+
+@receiver(connection_created)
+def install_query_recorder(connection, **kwargs):
+    """SQL-запросы учитываются в PerformanceMiddleware в любом потоке."""
+
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(instance, **kwargs):
+    forget_tokens((instance.key,))
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(instance, created, **kwargs):
+    """Закешированный вместе с токеном пользователь устаревает
+    после любого его изменения."""
+
+    if not created:
+        forget_tokens(
+            Token.objects.filter(user=instance).values_list('key', flat=True))
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def bump_tags_version(**kwargs):
+    bump_version('tags')
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def bump_ingredients_version(**kwargs):
+    """Новая версия ингредиентов сбрасывает условный GET
+    и перестраивает индекс ингредиентов во всех процессах."""
+
+    bump_version('ingredients')
+
+
+def invalidate_recipes():
+    invalidate_responses('recipes')
+
+
+def invalidate_recipe_responses():
+    """Сброс закешированных списков рецептов после фиксации транзакции,
+    чтобы ответ не собрался из ещё не записанных строк. Каскадное
+    удаление вызывает сигнал для каждой строки, а сброс нужен один."""
+
+    connection = transaction.get_connection()
+    if not any(callback[1] is invalidate_recipes
+               for callback in connection.run_on_commit):
+        transaction.on_commit(invalidate_recipes)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_recipe_list(**kwargs):
+    invalidate_recipe_responses()
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(action, **kwargs):
+    if action.startswith('post_'):
+        invalidate_recipe_responses()
+
+
+@receiver(post_save, sender=User)
+def invalidate_author(created, update_fields, **kwargs):
+    """Автор выводится в списке рецептов, вход пользователя
+    меняет только last_login и кеш не сбрасывает. У нового
+    пользователя ещё нет рецептов в закешированных ответах."""
+
+    if created or update_fields == frozenset(('last_login',)):
+        return
+    invalidate_recipe_responses()
+
+
+def sync_user_recipe_ids(relation, instance, action, reverse, pk_set):
+    """Изменения в избранном и списке покупок сбрасывают
+    закешированные множества id рецептов пользователей."""
+
+    if reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            forget_user_recipe_ids((instance.pk,), relation)
+    elif action in ('post_add', 'post_remove'):
+        forget_user_recipe_ids(pk_set, relation)
+    elif action == 'pre_clear':
+        forget_user_recipe_ids(
+            getattr(instance, relation).values_list('pk', flat=True),
+            relation
+        )
+
+
+def count_favorites(instance, action, reverse, pk_set):
+    """Счётчики избранного пересчитываются по таблице связей в той же
+    транзакции, в которой добавляются или удаляются связи.
+
+    pk_set содержит запрошенные id, а не реально изменённые строки,
+    поэтому счётчики не сдвигаются на его размер. Перед очисткой
+    запоминаются рецепты, счётчики которых нужно пересчитать после неё.
+    """
+
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            recount_favorites((instance.pk,))
+    elif action in ('post_add', 'post_remove'):
+        recount_favorites(pk_set)
+    elif action == 'pre_clear':
+        instance._cleared_favorites = list(
+            instance.favorites.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        recount_favorites(instance.__dict__.pop('_cleared_favorites', ()))
+
+
+@receiver(m2m_changed, sender=Recipe.favorites.through)
+def sync_favorites(instance, action, reverse, pk_set, **kwargs):
+    sync_user_recipe_ids('favorites', instance, action, reverse, pk_set)
+    count_favorites(instance, action, reverse, pk_set)
+
+
+@receiver(m2m_changed, sender=Recipe.shopping_cart.through)
+def sync_shopping_cart(instance, action, reverse, pk_set, **kwargs):
+    sync_user_recipe_ids('shopping_cart', instance, action, reverse, pk_set)
+
+
+@receiver(pre_delete, sender=User)
+def remember_user_favorites(instance, **kwargs):
+    """Связи удалённого пользователя удаляются каскадом без сигналов
+    m2m_changed, поэтому рецепты из его избранного запоминаются
+    до удаления, а их счётчики пересчитываются после."""
+
+    instance._deleted_favorites = list(
+        instance.favorites.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=User)
+def uncount_user_favorites(instance, **kwargs):
+    recount_favorites(instance.__dict__.pop('_deleted_favorites', ()))
+
+
+@receiver(post_save, sender=Recipe)
+def count_created_recipe(instance, created, **kwargs):
+    if created:
+        change_recipes_count(instance.author_id, 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def count_deleted_recipe(instance, **kwargs):
+    change_recipes_count(instance.author_id, -1)
+
+
+@receiver(post_save, sender=Recipe)
+def process_image(instance, **kwargs):
+    """Обработка нового изображения рецепта в фоне после
+    фиксации транзакции."""
+
+    image_name = instance.image.name or ''
+    if instance.image_variants.get('source', '') == image_name:
+        return
+    transaction.on_commit(lambda: run_once(
+        f'recipe_image:{instance.pk}:{image_name}',
+        process_recipe_image,
+        instance.pk,
+        image_name,
+        instance.image_variants,
+    ))
@@ -0,0 +1,47 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.BACKGROUND_WORKERS,
+    thread_name_prefix='foodgram-worker',
+)
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def _forget_job(key, future):
+    """Удаляет успешно завершённую задачу из списка выполняемых."""
+
+    if future.exception() is not None:
+        logger.error('Фоновая задача %s завершилась с ошибкой', key,
+                     exc_info=future.exception())
+        return
+    with _jobs_lock:
+        if _jobs.get(key) is future:
+            del _jobs[key]
+
+
+def run_once(key, func, *args):
+    """Запуск задачи в пуле фоновых потоков.
+
+    Пока задача с ключом key выполняется, повторный вызов возвращает
+    ту же задачу. Задача, завершившаяся с ошибкой, возвращается
+    один раз, чтобы вызывающий код мог сообщить об ошибке,
+    следующий вызов запускает её заново.
+    """
+
+    with _jobs_lock:
+        future = _jobs.pop(key, None)
+        if future is not None and not future.done():
+            _jobs[key] = future
+        elif future is None:
+            future = executor.submit(func, *args)
+            _jobs[key] = future
+            future.add_done_callback(partial(_forget_job, key))
+    return future
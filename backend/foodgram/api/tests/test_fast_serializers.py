@@ -0,0 +1,84 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+
+from api.fast_serializers import (IngredientValuesSerializer,
+                                  RecipeShortValuesSerializer,
+                                  TagValuesSerializer, UserValuesSerializer)
+from api.serializers import (CustomUserSerializer, IngredientSerializer,
+                             RecipeShortListSerializer, TagSerializer)
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import Subscription, User
+
+SERIALIZERS = (
+    (TagValuesSerializer, TagSerializer, Tag),
+    (IngredientValuesSerializer, IngredientSerializer, Ingredient),
+    (RecipeShortValuesSerializer, RecipeShortListSerializer, Recipe),
+    (UserValuesSerializer, CustomUserSerializer, User),
+)
+
+
+class ValuesSerializersTest(TestCase):
+    """Сериализаторы без дерева полей DRF отдают то же, что и обычные,
+    для queryset и для загруженных объектов, с запросом и без него."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='reader@foodgram.ru', username='reader',
+            first_name='Читатель', last_name='Рецептов', password='pass')
+        author = User.objects.create_user(
+            email='author@foodgram.ru', username='author',
+            first_name='Автор', last_name='Рецептов', password='pass')
+        Subscription.objects.create(subscriber=cls.user, author=author)
+        Tag.objects.create(name='Завтрак', color='#E26C2D', slug='breakfast')
+        Tag.objects.create(name='Обед', color='#49B64E', slug='lunch')
+        Ingredient.objects.create(name='Мука', measurement_unit='г')
+        Ingredient.objects.create(name='Молоко', measurement_unit='мл')
+        for name, image, variants in (
+            ('С копиями', 'recipes/current.png', {
+                'source': 'recipes/current.png',
+                'small': {'webp': 'recipes/variants/current-small.webp'},
+            }),
+            ('Копии старого изображения', 'recipes/new.png', {
+                'source': 'recipes/old.png',
+                'small': {'webp': 'recipes/variants/old-small.webp'},
+            }),
+            ('Без копий', 'recipes/plain.png', {}),
+            ('Без изображения', None, {}),
+        ):
+            Recipe.objects.create(
+                name=name, text='Описание', author=author, cooking_time=5,
+                image=image, image_variants=variants)
+
+    def contexts(self):
+        factory = APIRequestFactory()
+        anonymous = factory.get('/api/')
+        anonymous.user = AnonymousUser()
+        authenticated = factory.get('/api/')
+        authenticated.user = self.user
+        return {
+            'без запроса': {},
+            'аноним': {'request': anonymous},
+            'пользователь': {'request': authenticated},
+        }
+
+    def test_same_output(self):
+        for values_class, serializer_class, model in SERIALIZERS:
+            queryset = model.objects.order_by('pk')
+            for name, context in self.contexts().items():
+                with self.subTest(serializer=values_class.__name__,
+                                  context=name):
+                    self.assertEqual(
+                        values_class(
+                            queryset, many=True, context=dict(context)
+                        ).data,
+                        serializer_class(
+                            queryset, many=True, context=dict(context)
+                        ).data,
+                    )
+                    for obj in queryset:
+                        self.assertEqual(
+                            values_class(obj, context=dict(context)).data,
+                            serializer_class(obj, context=dict(context)).data,
+                        )
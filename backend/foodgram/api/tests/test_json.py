@@ -0,0 +1,173 @@
+import json
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from io import BytesIO
+
+from django.test import SimpleTestCase, TestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.parsers import ORJSONParser
+from api.renderers import ORJSONRenderer
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import User
+
+RECIPE = {
+    'id': 1,
+    'name': 'Борщ с пампушками',
+    'text': 'Кавычки " и обратный слеш \\, перевод строки\n, эмодзи 🍲',
+    'image': 'http://testserver/media/recipes/variants/1-small.webp',
+    'image_variants': {'small': {'webp': None}},
+    'tags': [{'id': 1, 'name': gettext_lazy('Завтрак'), 'color': '#E26C2D'}],
+    'amount': Decimal('1.50'),
+    'weight': 0.25,
+    'created': datetime(2023, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+    'moscow': datetime(
+        2023, 5, 1, 12, 30, tzinfo=timezone(timedelta(hours=3))),
+    'naive': datetime(2023, 5, 1, 12, 30),
+    'date': date(2023, 5, 1),
+    'time': time(8, 15, 30),
+    'cooking_time': timedelta(minutes=90),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'is_favorited': True,
+    'author': None,
+    'ingredients': (),
+}
+
+
+class ORJSONRendererTest(SimpleTestCase):
+    """ORJSONRenderer выдаёт те же байты, что JSONRenderer DRF."""
+
+    def assertSameOutput(self, data):
+        self.assertEqual(
+            ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_recipe_types(self):
+        self.assertSameOutput(RECIPE)
+        self.assertSameOutput([RECIPE, RECIPE])
+
+    def test_line_separators_are_escaped(self):
+        data = {'name': 'строка\u2028абзац\u2029'}
+        self.assertSameOutput(data)
+        self.assertNotIn('\u2028'.encode(), ORJSONRenderer().render(data))
+
+    def test_long_integers(self):
+        self.assertSameOutput({'id': 2 ** 64})
+        self.assertSameOutput({'id': -2 ** 63 - 1})
+        self.assertSameOutput({'id': 2 ** 63 - 1})
+
+    def test_empty_and_none(self):
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+        self.assertSameOutput({})
+        self.assertSameOutput([])
+
+    def test_indent(self):
+        renderer_context = {'indent': 4}
+        self.assertEqual(
+            ORJSONRenderer().render(RECIPE, renderer_context=renderer_context),
+            JSONRenderer().render(RECIPE, renderer_context=renderer_context))
+
+    def test_unsupported_values_raise_as_in_drf(self):
+        aware_time = time(8, 15, tzinfo=timezone.utc)
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({'time': aware_time})
+        with self.assertRaises(ValueError):
+            ORJSONRenderer().render({'time': aware_time})
+
+    def test_float_exponent_differs_but_parses_equal(self):
+        """Известное отличие: числа с плавающей точкой, которые json
+        выводит в экспоненциальной записи, orjson пишет иначе.
+        Значение после разбора то же, сериализаторы проекта таких
+        чисел не выдают."""
+
+        for value in (1e16, 1.5e-5, 123456789012345680.0):
+            data = {'value': value}
+            orjson_output = ORJSONRenderer().render(data)
+            self.assertNotEqual(orjson_output, JSONRenderer().render(data))
+            self.assertEqual(json.loads(orjson_output), data)
+        for value in (0.1, 1e15, 1e-4, -0.0):
+            self.assertSameOutput({'value': value})
+
+    def test_nan_is_rendered_as_null(self):
+        """Известное отличие: JSONRenderer отказывается выводить NaN
+        и бесконечности, orjson выводит их как null."""
+
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({'value': float('nan')})
+        self.assertEqual(
+            ORJSONRenderer().render({'value': float('nan')}),
+            b'{"value":null}')
+
+
+class ORJSONParserTest(SimpleTestCase):
+    """ORJSONParser разбирает тело так же, как JSONParser DRF."""
+
+    def parse(self, parser, body, encoding='utf-8'):
+        return parser.parse(
+            BytesIO(body), parser_context={'encoding': encoding})
+
+    def assertSameResult(self, body, encoding='utf-8'):
+        self.assertEqual(
+            self.parse(ORJSONParser(), body, encoding),
+            self.parse(JSONParser(), body, encoding))
+
+    def test_recipe_payload(self):
+        body = JSONRenderer().render(RECIPE)
+        self.assertSameResult(body)
+        self.assertSameResult(json.dumps(RECIPE, default=str).encode())
+
+    def test_long_integers(self):
+        for body in (b'{"id": 18446744073709551616}',
+                     b'[-9223372036854775809, 1]',
+                     b'{"id": 9223372036854775807}'):
+            self.assertSameResult(body)
+        self.assertEqual(
+            self.parse(ORJSONParser(), b'{"id": 18446744073709551616}'),
+            {'id': 2 ** 64})
+
+    def test_other_encoding(self):
+        body = '{"name": "Борщ"}'.encode('cp1251')
+        self.assertSameResult(body, encoding='cp1251')
+
+    def test_invalid_input(self):
+        for body in (b'', b'{"name": ', b'{"name": NaN}', b'\xff\xfe',
+                     b'{"name": "\xd0"}'):
+            with self.assertRaises(ParseError) as orjson_error:
+                self.parse(ORJSONParser(), body)
+            with self.assertRaises(ParseError) as json_error:
+                self.parse(JSONParser(), body)
+            self.assertEqual(
+                str(orjson_error.exception), str(json_error.exception))
+
+
+class APIResponseRenderingTest(TestCase):
+    """Ответы API, отрендеренные ORJSONRenderer, совпадают
+    с выводом JSONRenderer для тех же данных."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            email='author@foodgram.ru', username='author',
+            first_name='Автор', last_name='Рецептов', password='pass')
+        tag = Tag.objects.create(
+            name='Завтрак', color='#E26C2D', slug='breakfast')
+        ingredient = Ingredient.objects.create(
+            name='Свёкла', measurement_unit='г')
+        recipe = Recipe.objects.create(
+            name='Борщ\u2028с пампушками', text='Описание «в кавычках»',
+            author=author, cooking_time=90, image='recipes/borsch.png')
+        recipe.tags.set((tag,))
+        RecipeIngredient.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=300)
+
+    def test_responses(self):
+        client = APIClient()
+        for url in ('/api/recipes/', '/api/tags/', '/api/ingredients/'):
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response.content, JSONRenderer().render(response.data))
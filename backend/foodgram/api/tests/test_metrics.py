@@ -0,0 +1,36 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from api import metrics
+
+
+class MetricsTests(SimpleTestCase):
+    """Метрики хранятся в общем кеше и видны любому процессу."""
+
+    def setUp(self):
+        metrics.flush_metrics()
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def observe(self):
+        metrics.observe('RecipeViewSet.list', 'GET', 200, 0.02, 6, 0.004,
+                        0.001, 0.003)
+
+    def test_metrics_of_other_processes(self):
+        self.observe()
+        metrics.flush_metrics()
+        # Другой процесс: своих накопленных значений и меток у него нет.
+        with mock.patch.object(metrics, '_flushed_labels', set()):
+            self.observe()
+            output = metrics.render_metrics()
+        labels = 'view="RecipeViewSet.list",method="GET",status="2xx"'
+        for line in (
+            f'foodgram_request_duration_seconds_count{{{labels}}} 2',
+            f'foodgram_request_duration_seconds_bucket{{{labels},'
+            'le="0.025"} 2',
+            f'foodgram_request_queries_total{{{labels}}} 12',
+            f'foodgram_request_serialize_seconds_total{{{labels}}} 0.006',
+        ):
+            self.assertIn(line, output.splitlines())
@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import Subscription, User
+
+RECIPE_LIST_QUERIES = 6
+
+
+class RecipeListQueriesTest(TestCase):
+    """Список рецептов выполняет одно и то же число запросов
+    при любом размере страницы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='reader@foodgram.ru', username='reader',
+            first_name='Читатель', last_name='Рецептов', password='pass')
+        authors = [
+            User.objects.create_user(
+                email=f'author{number}@foodgram.ru',
+                username=f'author{number}', first_name='Автор',
+                last_name=str(number), password='pass')
+            for number in range(3)
+        ]
+        Subscription.objects.create(subscriber=cls.user, author=authors[0])
+        tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', color=f'#00000{number}',
+                slug=f'tag{number}')
+            for number in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(5)
+        ]
+        for number in range(12):
+            recipe = Recipe.objects.create(
+                name=f'Рецепт {number}', text='Описание',
+                author=authors[number % 3], cooking_time=number + 1,
+                image='recipes/test.png')
+            recipe.tags.set(tags[:number % 3 + 1])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=number + 1)
+                for ingredient in ingredients[:number % 5 + 1]
+            )
+            if number % 2:
+                recipe.favorites.add(cls.user)
+                recipe.shopping_cart.add(cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user)}')
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        for limit in (3, 10):
+            url = f'/api/recipes/?limit={limit}'
+            self.client.get(url)
+            with self.assertNumQueries(RECIPE_LIST_QUERIES):
+                response = self.client.get(url)
+            self.assertEqual(len(response.json()['results']), limit)
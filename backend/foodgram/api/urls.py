@@ -1,6 +1,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from . import async_views
 from .views import (CustomUserViewSet, IngredientViewSet, RecipeViewSet,
                     TagViewSet)
 
@@ -13,8 +14,22 @@ router.register(r'tags', TagViewSet, basename='tags')
 router.register(r'ingredients', IngredientViewSet, basename='ingredients')
 router.register(r'recipes', RecipeViewSet, basename='recipes')
 
+async_urlpatterns = [
+    path('recipes/', async_views.recipe_list, name='recipes-list'),
+    path('recipes/<int:pk>/', async_views.recipe_detail,
+         name='recipes-detail'),
+    path('tags/', async_views.tag_list, name='tags-list'),
+    path('tags/<int:pk>/', async_views.tag_detail, name='tags-detail'),
+    path('ingredients/', async_views.ingredient_list,
+         name='ingredients-list'),
+    path('ingredients/<int:pk>/', async_views.ingredient_detail,
+         name='ingredients-detail'),
+    path('users/subscriptions/', async_views.subscription_list,
+         name='users-subscriptions'),
+]
 
 urlpatterns = [
     path('', include(router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
+    path('async/', include((async_urlpatterns, 'async'))),
 ]
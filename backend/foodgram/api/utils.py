@@ -1,9 +1,18 @@
+import hashlib
 import io
+import json
+import logging
+import os
+from functools import lru_cache
 
-from django.http import HttpResponse
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Subquery, Sum
 from django.shortcuts import get_object_or_404
 from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfbase.ttfonts import TTFError, TTFont
 from reportlab.pdfgen import canvas
 from rest_framework import status
 from rest_framework.response import Response
@@ -11,28 +20,87 @@ from rest_framework.response import Response
 from foodgram.constants import (FONT_HEIGHT, HORISONTAL_POSITION_TEXT_ON_PAGE,
                                 HORISONTAL_POSITION_TITUL_ON_PAGE,
                                 MAX_INTERVAL_LINES, MIN_VALUE,
+                                PDF_FALLBACK_FONT, PDF_FONT, PDF_FONT_FILE,
+                                RECIPES_LIMIT, SHOPPING_CART_PDF_DIR,
                                 VERTICAL_POSITION_TEXT_ON_PAGE,
                                 VERTICAL_POSITION_TITUL_ON_PAGE)
-from recipes.models import Recipe
+from api.caching import forget_user_recipe_ids
+from api.counters import recount_favorites
+from api.serializers import RecipeIdsSerializer
+from recipes.models import Recipe, RecipeIngredient
+
+logger = logging.getLogger(__name__)
+
+
+def get_shopping_cart_ingredients(user):
+    """Суммарное количество каждого ингредиента из списка покупок,
+    сгруппированное на стороне БД по названию и единице измерения."""
+
+    return RecipeIngredient.objects.filter(
+        recipe__shopping_cart=user
+    ).values(
+        'ingredient__name',
+        'ingredient__measurement_unit',
+    ).annotate(
+        ingredient_value=Sum('amount')
+    ).order_by(
+        'ingredient__name',
+        'ingredient__measurement_unit',
+    )
+
+
+def shopping_cart_lines(ingredients_cart):
+    """Построчная генерация текстового списка покупок."""
+
+    yield 'Cписок покупок:'
+    for ingredient in ingredients_cart:
+        yield (
+            f"\n{ingredient['ingredient__name']} - "
+            f"{ingredient['ingredient_value']} "
+            f"{ingredient['ingredient__measurement_unit']}."
+        )
+
+
+@lru_cache(maxsize=None)
+def register_pdf_font():
+    """Регистрация шрифта для PDF один раз на процесс.
+
+    Возвращает имя шрифта. Если файл шрифта недоступен, используется
+    встроенный шрифт reportlab, чтобы список покупок всё равно
+    сформировался.
+    """
+
+    try:
+        pdfmetrics.registerFont(
+            TTFont(PDF_FONT, os.path.join(settings.CSV_FILES, PDF_FONT_FILE))
+        )
+    except TTFError:
+        logger.exception('Не удалось загрузить шрифт %s, используется %s',
+                         PDF_FONT_FILE, PDF_FALLBACK_FONT)
+        return PDF_FALLBACK_FONT
+    return PDF_FONT
+
+
+def get_shopping_cart_pdf_name(ingredients_cart):
+    """Имя файла PDF в хранилище по хешу содержимого списка покупок."""
+
+    content = json.dumps(ingredients_cart, ensure_ascii=False,
+                         sort_keys=True)
+    digest = hashlib.sha256(content.encode()).hexdigest()
+    return f'{SHOPPING_CART_PDF_DIR}{digest}.pdf'
 
 
 def create_shopping_cart(ingredients_cart):
     """Функция для формирования списка покупок для скачивания."""
 
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = (
-        "attachment; filename='shopping_cart.pdf'"
-    )
-    pdfmetrics.registerFont(
-        TTFont('Arial', 'data/arial.ttf', 'UTF-8')
-    )
+    font = register_pdf_font()
     buffer = io.BytesIO()
     pdf_file = canvas.Canvas(buffer)
-    pdf_file.setFont('Arial', FONT_HEIGHT)
+    pdf_file.setFont(font, FONT_HEIGHT)
     pdf_file.drawString(VERTICAL_POSITION_TITUL_ON_PAGE,
                         HORISONTAL_POSITION_TITUL_ON_PAGE,
                         'Список покупок.')
-    pdf_file.setFont('Arial', FONT_HEIGHT)
+    pdf_file.setFont(font, FONT_HEIGHT)
     from_bottom = VERTICAL_POSITION_TEXT_ON_PAGE
     for number, ingredient in enumerate(ingredients_cart, start=MIN_VALUE):
         pdf_file.drawString(
@@ -46,13 +114,21 @@ def create_shopping_cart(ingredients_cart):
         if from_bottom <= HORISONTAL_POSITION_TEXT_ON_PAGE:
             from_bottom = HORISONTAL_POSITION_TITUL_ON_PAGE
             pdf_file.showPage()
-            pdf_file.setFont('Arial', FONT_HEIGHT)
+            pdf_file.setFont(font, FONT_HEIGHT)
     pdf_file.showPage()
     pdf_file.save()
     pdf = buffer.getvalue()
     buffer.close()
-    response.write(pdf)
-    return response
+    return pdf
+
+
+def save_shopping_cart_pdf(name, ingredients_cart):
+    """Фоновое формирование PDF и сохранение его в хранилище."""
+
+    if not default_storage.exists(name):
+        default_storage.save(
+            name, ContentFile(create_shopping_cart(ingredients_cart))
+        )
 
 
 def add_or_del_obj(pk, request, param, serializer_context):
@@ -61,7 +137,7 @@ def add_or_del_obj(pk, request, param, serializer_context):
     obj = get_object_or_404(Recipe, pk=pk)
     obj_bool = param.filter(pk=obj.pk).exists()
     if request.method == 'DELETE' and obj_bool:
-        param.clear()
+        param.remove(obj)
         return Response(status=status.HTTP_204_NO_CONTENT)
     if request.method == 'POST' and not obj_bool:
         param.add(obj)
@@ -69,3 +145,107 @@ def add_or_del_obj(pk, request, param, serializer_context):
             obj, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(status=status.HTTP_400_BAD_REQUEST)
+
+
+def bulk_add_or_del_objs(request, relation):
+    """Массовое добавление или удаление рецептов в избранном
+    (relation='favorites') или списке покупок (relation='shopping_cart').
+
+    id проверяются одним запросом, связи создаются или удаляются
+    ещё одним, в ответе указан результат для каждого id. Строки
+    рецептов блокируются на время транзакции, поэтому параллельные
+    запросы с теми же id не добавляют связи и не меняют счётчики
+    избранного дважды.
+    """
+
+    serializer = RecipeIdsSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    recipe_ids = list(dict.fromkeys(serializer.validated_data['recipes']))
+    user = request.user
+    through = getattr(Recipe, relation).through
+    with transaction.atomic():
+        linked = dict(
+            Recipe.objects.select_for_update().filter(
+                pk__in=recipe_ids
+            ).order_by('pk').annotate(
+                linked=Exists(through.objects.filter(
+                    recipe=OuterRef('pk'), user=user))
+            ).values_list('pk', 'linked')
+        )
+        if request.method == 'POST':
+            changed = [pk for pk, is_linked in linked.items()
+                       if not is_linked]
+            through.objects.bulk_create(
+                (through(user=user, recipe_id=pk) for pk in changed),
+                ignore_conflicts=True
+            )
+            statuses = {True: 'already_added', False: 'added'}
+        else:
+            changed = [pk for pk, is_linked in linked.items() if is_linked]
+            through.objects.filter(
+                user=user, recipe_id__in=changed).delete()
+            statuses = {True: 'removed', False: 'not_added'}
+        if relation == 'favorites' and changed:
+            recount_favorites(changed)
+        if changed:
+            forget_user_recipe_ids((user.pk,), relation)
+    return Response(
+        {
+            'results': [
+                {
+                    'id': pk,
+                    'status': (statuses[linked[pk]] if pk in linked
+                               else 'not_found'),
+                }
+                for pk in recipe_ids
+            ]
+        },
+        status=status.HTTP_200_OK
+    )
+
+
+def get_recipes_queryset():
+    """Рецепты со всеми связанными данными
+    за фиксированное число запросов."""
+
+    return Recipe.objects.select_related('author').prefetch_related(
+        'tags',
+        Prefetch(
+            'recipe_ingredient',
+            queryset=RecipeIngredient.objects.select_related('ingredient')
+        ),
+    )
+
+
+def get_recipes_limit(request):
+    """Количество рецептов автора из параметра recipes_limit."""
+
+    recipes_limit = request.query_params.get('recipes_limit', '')
+    if recipes_limit.isdigit():
+        return int(recipes_limit)
+    return RECIPES_LIMIT
+
+
+def annotate_subscriptions(authors, recipes_limit):
+    """Последние recipes_limit рецептов каждого автора выбираются
+    одним запросом на всю страницу, число рецептов хранится
+    в User.recipes_count.
+
+    Подзапрос по автору читает индекс recipe_author_latest_idx
+    (author, -created, -id) и останавливается на recipes_limit строках.
+    """
+
+    latest_recipes = Recipe.objects.filter(
+        author=OuterRef('author')
+    ).order_by('-created', '-id').values('pk')[:recipes_limit]
+    return authors.prefetch_related(
+        Prefetch(
+            'recipes',
+            queryset=Recipe.objects.filter(
+                pk__in=Subquery(latest_recipes)
+            ).order_by('-created', '-id').only(
+                'id', 'name', 'image', 'image_variants', 'cooking_time',
+                'author'),
+            to_attr='latest_recipes'
+        )
+    )
@@ -1,21 +1,33 @@
-import collections
-
-from django.http import HttpResponse
+from django.core.files.storage import default_storage
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.generics import get_object_or_404
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
-from api.pagination import LimitPagePagination
-from api.utils import add_or_del_obj
-from .filters import IngredientSearchFilter, RecipeSearchFilter
-from foodgram.constants import VALUE_ZERO
-from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from api.caching import (cache_response, get_cached_response,
+                         response_cache_key, versioned_condition)
+from api.fast_serializers import (IngredientValuesSerializer,
+                                  TagValuesSerializer)
+from api.feed import backfill_feed, fan_out_recipe, get_feed, prune_feed
+from api.pagination import (LimitOffsetApproximatePagination,
+                            LimitPagePagination, RecipePagination)
+from api.search import ingredient_index
+from api.tasks import run_once
+from api.utils import (add_or_del_obj, annotate_subscriptions,
+                       bulk_add_or_del_objs, get_recipes_limit,
+                       get_recipes_queryset, get_shopping_cart_ingredients,
+                       get_shopping_cart_pdf_name, register_pdf_font,
+                       save_shopping_cart_pdf, shopping_cart_lines)
+from foodgram.constants import PDF_RETRY_AFTER
+from .filters import RecipeSearchFilter
+from recipes.models import Ingredient, Recipe, Tag
 from .permissions import AnonimOrAuthenticatedReadOnly, IsAuthorOrReadOnly
 from .serializers import (CustomUserSerializer, IngredientSerializer,
                           RecipeCreateSerializer, RecipeSerializer,
@@ -77,6 +89,10 @@ class CustomUserViewSet(UserViewSet):
             )
             serializer.is_valid(raise_exception=True)
             serializer.save()
+            backfill_feed(subscriber, author)
+            author = annotate_subscriptions(
+                User.objects.filter(pk=author.pk), get_recipes_limit(request)
+            ).get()
             author_serializer = SubscriptionShowSerializer(
                 author, context={'request': request}
             )
@@ -85,6 +101,7 @@ class CustomUserViewSet(UserViewSet):
             )
         if change_subscription.exists():
             change_subscription.delete()
+            prune_feed(subscriber, author)
             return Response(f'Вы отписались от {author}',
                             status=status.HTTP_204_NO_CONTENT)
         return Response(f'Вы не подписаны на {author}',
@@ -100,8 +117,11 @@ class CustomUserViewSet(UserViewSet):
     def get_subscriptions(self, request):
         """Получение подписок на авторов."""
 
-        authors = User.objects.filter(author__subscriber=request.user)
-        paginator = LimitOffsetPagination()
+        authors = annotate_subscriptions(
+            User.objects.filter(author__subscriber=request.user),
+            get_recipes_limit(request)
+        )
+        paginator = LimitOffsetApproximatePagination()
         result_pages = paginator.paginate_queryset(
             queryset=authors, request=request
         )
@@ -111,6 +131,8 @@ class CustomUserViewSet(UserViewSet):
         return paginator.get_paginated_response(serializer.data)
 
 
+@method_decorator(versioned_condition('tags'), name='list')
+@method_decorator(versioned_condition('tags'), name='retrieve')
 class TagViewSet(ReadOnlyModelViewSet):
     """ВьюСет для тегов."""
 
@@ -119,7 +141,13 @@ class TagViewSet(ReadOnlyModelViewSet):
     serializer_class = TagSerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return Response(TagValuesSerializer(
+            self.filter_queryset(self.get_queryset()), many=True).data)
+
 
+@method_decorator(versioned_condition('ingredients'), name='list')
+@method_decorator(versioned_condition('ingredients'), name='retrieve')
 class IngredientViewSet(ReadOnlyModelViewSet):
     """ВьюСет для ингридиентов."""
 
@@ -127,34 +155,87 @@ class IngredientViewSet(ReadOnlyModelViewSet):
     permission_classes = (AllowAny,)
     serializer_class = IngredientSerializer
     pagination_class = None
-    filter_backends = (DjangoFilterBackend,)
-    filterset_class = IngredientSearchFilter
     search_fields = ('^name', )
 
+    def list(self, request, *args, **kwargs):
+        """Поиск по началу названия обслуживается индексом в памяти,
+        совпадения в середине названия выводятся после них."""
+
+        name = request.query_params.get('name')
+        if name:
+            return Response(ingredient_index.search(name))
+        return Response(IngredientValuesSerializer(
+            self.filter_queryset(self.get_queryset()), many=True).data)
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
     """ВьюСет для создания рецепта."""
 
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
-    pagination_class = LimitPagePagination
+    pagination_class = RecipePagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeSearchFilter
     permission_classes = (IsAuthorOrReadOnly,)
 
+    def get_queryset(self):
+        return get_recipes_queryset()
+
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return RecipeSerializer
         return RecipeCreateSerializer
 
+    def list(self, request, *args, **kwargs):
+        """Ответы анонимным пользователям одинаковы для одной строки
+        запроса и берутся из общего кеша до следующего изменения
+        рецептов."""
+
+        if not request.user.is_anonymous:
+            return super().list(request, *args, **kwargs)
+        key = response_cache_key(request, 'recipes')
+        data = get_cached_response(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache_response(key, response.data)
+        return response
+
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        recipe = serializer.save(author=self.request.user)
+        fan_out_recipe(recipe)
+
+    @action(
+        methods=['get'],
+        detail=False,
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь."""
+
+        page = self.paginate_queryset(get_feed(request.user))
+        recipes = self.get_queryset().in_bulk(page)
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in page if pk in recipes], many=True
+        )
+        return self.get_paginated_response(serializer.data)
 
     @action(methods=['post', 'delete'], detail=True)
     def favorite(self, request, pk):
         return add_or_del_obj(pk, request, request.user.favorites,
                               RecipeShortListSerializer)
 
+    @action(
+        methods=['post', 'delete'],
+        detail=False,
+        url_path='favorite',
+        url_name='favorite-bulk',
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def favorite_bulk(self, request):
+        return bulk_add_or_del_objs(request, 'favorites')
+
     @action(methods=['get'], detail=True)
     def favorited(self, request):
         user = request.user
@@ -170,23 +251,57 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return add_or_del_obj(pk, request, request.user.shopping_cart,
                               RecipeShortListSerializer)
 
-    @action(methods=['get'], detail=False)
+    @action(
+        methods=['post', 'delete'],
+        detail=False,
+        url_path='shopping_cart',
+        url_name='shopping_cart-bulk',
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def shopping_cart_bulk(self, request):
+        return bulk_add_or_del_objs(request, 'shopping_cart')
+
+    @action(
+        methods=['get'],
+        detail=False,
+        permission_classes=(permissions.IsAuthenticated,)
+    )
     def download_shopping_cart(self, request):
-        user = request.user
-        filename = f'{user.username}_shopping_list.txt'
-        ingredients = (RecipeIngredient.objects.filter(
-            recipe__in=request.user.shopping_cart.all()).values_list(
-                'ingredient__name', 'amount', 'ingredient__measurement_unit'))
-        result = collections.defaultdict(lambda: (VALUE_ZERO, ''))
-        for ingredient, amount, unit in ingredients:
-            result[ingredient] = (
-                result[ingredient][VALUE_ZERO] + amount, unit)
-            file_list = []
-            [file_list.append(
-                '{} - {} {}.'.format(ingredient, amount, unit)) for ingredient,
-                (amount, unit) in result.items()]
-            file = HttpResponse('Cписок покупок:\n' + '\n'.join(file_list),
-                                content_type='text/plain')
-            file['Content-Disposition'] = (
-                f'attachment; filename="{filename}"')
+        filename = f'{request.user.username}_shopping_list.txt'
+        ingredients = get_shopping_cart_ingredients(request.user)
+        file = StreamingHttpResponse(
+            shopping_cart_lines(ingredients.iterator()),
+            content_type='text/plain'
+        )
+        file['Content-Disposition'] = f'attachment; filename="{filename}"'
         return file
+
+    @action(
+        methods=['get'],
+        detail=False,
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def download_shopping_cart_pdf(self, request):
+        """PDF списка покупок формируется в фоне и кешируется
+        в хранилище по хешу содержимого. Пока файл не готов,
+        клиент получает 202 и повторяет запрос."""
+
+        ingredients = list(get_shopping_cart_ingredients(request.user))
+        name = get_shopping_cart_pdf_name(ingredients)
+        if default_storage.exists(name):
+            return redirect(default_storage.url(name))
+        register_pdf_font()
+        job = run_once(name, save_shopping_cart_pdf, name, ingredients)
+        if job.done() and job.exception() is not None:
+            return Response(
+                {'detail': 'Не удалось сформировать список покупок.'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        return Response(
+            {'detail': 'Список покупок формируется, повторите запрос.'},
+            status=status.HTTP_202_ACCEPTED,
+            headers={
+                'Location': request.build_absolute_uri(),
+                'Retry-After': str(PDF_RETRY_AFTER),
+            }
+        )
@@ -12,3 +12,30 @@ HORISONTAL_POSITION_TITUL_ON_PAGE = 800
 VERTICAL_POSITION_TEXT_ON_PAGE = 750
 HORISONTAL_POSITION_TEXT_ON_PAGE = 50
 MAX_INTERVAL_LINES = 20
+PDF_FONT = 'DejaVuSans'
+PDF_FONT_FILE = 'DejaVuSans.ttf'
+PDF_FALLBACK_FONT = 'Helvetica'
+SHOPPING_CART_PDF_DIR = 'shopping_carts/'
+PDF_RETRY_AFTER = 1
+SEARCH_CONFIG = 'russian'
+USER_RECIPES_TIMEOUT = 60 * 60
+AUTH_TOKEN_TIMEOUT = 5 * 60
+RESPONSE_CACHE_TIMEOUT = 5 * 60
+APPROXIMATE_COUNT_THRESHOLD = 10000
+FEED_FANOUT_LIMIT = 10000
+FEED_BACKFILL_LIMIT = 50
+FEED_BATCH_SIZE = 1000
+BULK_RECIPES_LIMIT = 1000
+IMAGE_VARIANT_SIZES = (('small', 320), ('medium', 960))
+IMAGE_VARIANTS_DIR = 'recipes/variants/'
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+IMPORT_BATCH_SIZE = 5000
+IMPORT_READ_SIZE = 64 * 1024
+SEED_USERNAME_PREFIX = 'bench_user_'
+SEED_PASSWORD = 'bench-password'
+SEED_BATCH_SIZE = 5000
+SLOW_REQUEST_MS = 500
+SLOW_REQUEST_QUERIES = 5
+METRICS_FLUSH_INTERVAL = 1
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
@@ -3,9 +3,12 @@ from django.contrib import admin
 from django.conf.urls.static import static
 from django.urls import include, path
 
+from api.metrics import metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    path('metrics', metrics, name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -7,23 +7,40 @@ from .models import Ingredient, Recipe, RecipeIngredient, Tag
 class RecipeIngredientInline(admin.StackedInline):
     model = RecipeIngredient
     min_num = MIN_VALUE
+    autocomplete_fields = ('ingredient',)
+
+
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'color', 'slug')
+    search_fields = ('name',)
 
 
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('name', 'author', 'favorites_count',)
-    list_filter = ('name', 'author', 'tags',)
+    list_display = ('name', 'author', 'favorites_count', 'created')
+    list_select_related = ('author',)
+    list_filter = ('tags',)
+    search_fields = ('name',)
+    readonly_fields = ('favorites_count',)
+    autocomplete_fields = ('author', 'tags')
+    raw_id_fields = ('favorites', 'shopping_cart')
+    show_full_result_count = False
     inlines = [RecipeIngredientInline, ]
 
-    def favorites_count(self, obj):
-        return obj.favorites.count()
-
 
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('name', 'measurement_unit')
-    list_filter = ('name',)
+    search_fields = ('name',)
+    show_full_result_count = False
+
+
+class RecipeIngredientAdmin(admin.ModelAdmin):
+    list_display = ('recipe', 'ingredient', 'amount')
+    list_select_related = ('recipe', 'ingredient')
+    autocomplete_fields = ('recipe', 'ingredient')
+    show_full_result_count = False
 
 
-admin.site.register(Tag)
+admin.site.register(Tag, TagAdmin)
 admin.site.register(Ingredient, IngredientAdmin)
 admin.site.register(Recipe, RecipeAdmin)
-admin.site.register(RecipeIngredient)
+admin.site.register(RecipeIngredient, RecipeIngredientAdmin)
@@ -1,29 +1,170 @@
 import csv
+import io
+import json
+import os
+import re
+import time
+from itertools import islice
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 
+from api.caching import bump_version
+from foodgram.constants import IMPORT_BATCH_SIZE, IMPORT_READ_SIZE
 from foodgram.settings import CSV_FILES
 from recipes.models import Ingredient
 
+CSV_HEADER = ['name', 'measurement_unit']
+JSON_SEPARATORS = re.compile(r'[\s,\[\]]*')
+
+
+def read_csv(file):
+    """Строки CSV-файла вида «название,единица измерения»,
+    строка заголовка пропускается."""
+
+    for row in csv.reader(file):
+        if len(row) >= 2 and row[:2] != CSV_HEADER:
+            yield row[0].strip(), row[1].strip()
+
+
+def read_json(file):
+    """Потоковое чтение JSON-массива объектов или JSON Lines
+    без загрузки всего файла в память.
+
+    Записи разбираются по смещению в буфере, сам буфер обрезается
+    только при чтении следующей части файла.
+    """
+
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+    number = 0
+    while True:
+        position = JSON_SEPARATORS.match(buffer, position).end()
+        if position == len(buffer):
+            if eof:
+                return
+            chunk = file.read(IMPORT_READ_SIZE)
+            eof = not chunk
+            buffer, position = chunk, 0
+            continue
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = file.read(IMPORT_READ_SIZE)
+            if not chunk:
+                raise CommandError('Некорректный JSON в конце файла')
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        number += 1
+        yield json_row(item, number)
+
+
+def json_row(item, number):
+    """Название и единица измерения из JSON-объекта ингредиента."""
+
+    try:
+        return item['name'].strip(), item['measurement_unit'].strip()
+    except (KeyError, TypeError, AttributeError):
+        record = json.dumps(item, ensure_ascii=False)[:200]
+        raise CommandError(
+            f'Запись {number}: ожидается объект со строковыми полями '
+            f'{", ".join(CSV_HEADER)}, получено {record}'
+        )
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
 
 class Command(BaseCommand):
-    """Команда для загрузки ингредиентов из CSV в БД"""
+    """Команда для загрузки ингредиентов из CSV или JSON в БД.
+
+    Повторный запуск не создаёт дубликатов: строки с уже существующей
+    парой (название, единица измерения) пропускаются. В PostgreSQL
+    данные копируются через COPY во временную таблицу, в остальных
+    СУБД добавляются пакетами через bulk_create.
+    """
 
     help = 'Загрузка ингредиентов в БД'
 
-    def handle(self, *args, **kwargs):
-        with open(
-                f'{CSV_FILES}/ingredients.csv', encoding='utf-8'
-        ) as file:
-            reader = csv.reader(file)
-            next(reader)
-            ingredients = [
-                Ingredient(
-                    name=row[0],
-                    measurement_unit=row[1],
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?',
+            default=os.path.join(CSV_FILES, 'ingredients.csv'),
+            help='Путь к файлу с ингредиентами (.csv, .json, .jsonl)')
+        parser.add_argument(
+            '--format', choices=('csv', 'json'),
+            help='Формат файла, по умолчанию определяется по расширению')
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+            help='Количество строк в одном пакете')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'json')
+        reader = read_csv if file_format == 'csv' else read_json
+        self.started = time.monotonic()
+        self.processed = 0
+        created_before = Ingredient.objects.count()
+        with open(path, encoding='utf-8', newline='') as file:
+            chunks = chunked(reader(file), options['batch_size'])
+            with transaction.atomic():
+                if connection.vendor == 'postgresql':
+                    self.copy_chunks(chunks)
+                else:
+                    self.insert_chunks(chunks, options['batch_size'])
+        bump_version('ingredients')
+        created = Ingredient.objects.count() - created_before
+        self.stdout.write(self.style.SUCCESS(
+            f'Ингредиенты загружены: обработано {self.processed}, '
+            f'добавлено {created} за {time.monotonic() - self.started:.1f} с'
+        ))
+
+    def report(self, rows):
+        self.processed += rows
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            f'Обработано {self.processed} строк '
+            f'({self.processed / max(elapsed, 1e-6):.0f} строк/с)'
+        )
+
+    def insert_chunks(self, chunks, batch_size):
+        for chunk in chunks:
+            Ingredient.objects.bulk_create(
+                (Ingredient(name=name, measurement_unit=unit)
+                 for name, unit in chunk),
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+            self.report(len(chunk))
+
+    def copy_chunks(self, chunks):
+        table = connection.ops.quote_name(Ingredient._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE ingredient_import '
+                '(name text, measurement_unit text) ON COMMIT DROP'
+            )
+            for chunk in chunks:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(chunk)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    'COPY ingredient_import FROM STDIN WITH (FORMAT csv)',
+                    buffer
                 )
-                for row in reader
-            ]
-            Ingredient.objects.bulk_create(ingredients)
-        print('Ингредиенты загружены')
-        print('ADD', Ingredient.objects.count(), 'Ingredient')
+                self.report(len(chunk))
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT DISTINCT name, measurement_unit '
+                'FROM ingredient_import '
+                'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.counters import recount_favorites, recount_recipes
+
+
+class Command(BaseCommand):
+    """Команда для пересчёта счётчиков избранного у рецептов
+    и количества рецептов у авторов по фактическим данным."""
+
+    help = 'Пересчёт счётчиков favorites_count и recipes_count'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            recipes = recount_favorites()
+            users = recount_recipes()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано рецептов: {recipes}, пользователей: {users}'
+        ))
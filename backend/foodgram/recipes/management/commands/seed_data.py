@@ -0,0 +1,185 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.caching import bump_version, invalidate_responses
+from api.counters import recount_favorites, recount_recipes
+from foodgram.constants import (FEED_BACKFILL_LIMIT, MAX_VALUE, MIN_VALUE,
+                                SEED_BATCH_SIZE, SEED_PASSWORD,
+                                SEED_USERNAME_PREFIX)
+from recipes.models import FeedEntry, Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import Subscription, User
+
+SEED_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+
+
+class Command(BaseCommand):
+    """Команда для заполнения БД синтетическими данными.
+
+    При одинаковых параметрах и seed создаётся один и тот же набор
+    данных, ранее созданные командой пользователи и их рецепты
+    удаляются. Все строки добавляются пакетами через bulk_create.
+    """
+
+    help = 'Заполнение БД синтетическими данными для бенчмарков'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes-per-user', type=int, default=10)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--subscriptions-per-user', type=int, default=10)
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--cart-per-user', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        with transaction.atomic():
+            User.objects.filter(
+                username__startswith=SEED_USERNAME_PREFIX).delete()
+            tag_ids = self.create_tags()
+            ingredient_ids = self.create_ingredients(options['ingredients'])
+            user_ids = self.create_users(options['users'])
+            recipes = self.create_recipes(
+                user_ids, options['recipes_per_user'])
+            recipe_ids = [recipe_id for recipe_id, _ in recipes]
+            self.create_recipe_relations(
+                recipe_ids, tag_ids, ingredient_ids,
+                options['ingredients_per_recipe'])
+            subscriptions = self.create_subscriptions(
+                user_ids, options['subscriptions_per_user'])
+            self.create_feeds(recipes, subscriptions)
+            for relation, per_user in (
+                ('favorites', options['favorites_per_user']),
+                ('shopping_cart', options['cart_per_user']),
+            ):
+                self.create_user_recipes(
+                    relation, user_ids, recipe_ids, per_user)
+            recount_favorites()
+            recount_recipes()
+        bump_version('tags')
+        bump_version('ingredients')
+        invalidate_responses('recipes')
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(user_ids)}, '
+            f'рецептов: {len(recipe_ids)}, подписок: {len(subscriptions)}'
+        ))
+
+    def bulk_create(self, model, objects):
+        model.objects.bulk_create(
+            objects, batch_size=SEED_BATCH_SIZE, ignore_conflicts=True)
+
+    def sample(self, population, count):
+        return self.random.sample(population, min(count, len(population)))
+
+    def create_tags(self):
+        self.bulk_create(Tag, [
+            Tag(name=name, color=color, slug=slug)
+            for name, color, slug in SEED_TAGS
+        ])
+        return list(Tag.objects.filter(
+            slug__in=[slug for _, _, slug in SEED_TAGS]
+        ).values_list('pk', flat=True))
+
+    def create_ingredients(self, count):
+        self.bulk_create(Ingredient, [
+            Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+            for number in range(count)
+        ])
+        return list(
+            Ingredient.objects.order_by('pk').values_list('pk', flat=True))
+
+    def create_users(self, count):
+        password = make_password(SEED_PASSWORD)
+        self.bulk_create(User, [
+            User(
+                username=f'{SEED_USERNAME_PREFIX}{number}',
+                email=f'{SEED_USERNAME_PREFIX}{number}@example.com',
+                first_name='Бенчмарк',
+                last_name=str(number),
+                password=password,
+            )
+            for number in range(count)
+        ])
+        return list(User.objects.filter(
+            username__startswith=SEED_USERNAME_PREFIX
+        ).order_by('pk').values_list('pk', flat=True))
+
+    def create_recipes(self, user_ids, per_user):
+        self.bulk_create(Recipe, [
+            Recipe(
+                name=f'Рецепт {user_id}-{number}',
+                text=f'Описание рецепта {number} пользователя {user_id}',
+                author_id=user_id,
+                cooking_time=self.random.randint(MIN_VALUE, 180),
+            )
+            for user_id in user_ids
+            for number in range(per_user)
+        ])
+        return list(Recipe.objects.filter(
+            author_id__in=user_ids
+        ).order_by('pk').values_list('pk', 'author_id'))
+
+    def create_recipe_relations(self, recipe_ids, tag_ids, ingredient_ids,
+                                per_recipe):
+        self.bulk_create(Recipe.tags.through, [
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in self.sample(tag_ids, self.random.randint(1, 2))
+        ])
+        self.bulk_create(RecipeIngredient, [
+            RecipeIngredient(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=self.random.randint(MIN_VALUE, MAX_VALUE // 100),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in self.sample(ingredient_ids, per_recipe)
+        ])
+
+    def create_subscriptions(self, user_ids, per_user):
+        subscriptions = [
+            (subscriber_id, author_id)
+            for subscriber_id in user_ids
+            for author_id in self.sample(user_ids, per_user + 1)
+            if author_id != subscriber_id
+        ][:len(user_ids) * per_user]
+        self.bulk_create(Subscription, [
+            Subscription(subscriber_id=subscriber_id, author_id=author_id)
+            for subscriber_id, author_id in subscriptions
+        ])
+        return subscriptions
+
+    def create_feeds(self, recipes, subscriptions):
+        created = dict(Recipe.objects.filter(
+            pk__in=[recipe_id for recipe_id, _ in recipes]
+        ).values_list('pk', 'created'))
+        author_recipes = {}
+        for recipe_id, author_id in reversed(recipes):
+            author_recipes.setdefault(author_id, []).append(recipe_id)
+        self.bulk_create(FeedEntry, [
+            FeedEntry(
+                subscriber_id=subscriber_id,
+                recipe_id=recipe_id,
+                author_id=author_id,
+                created=created[recipe_id],
+            )
+            for subscriber_id, author_id in subscriptions
+            for recipe_id in author_recipes.get(
+                author_id, [])[:FEED_BACKFILL_LIMIT]
+        ])
+
+    def create_user_recipes(self, relation, user_ids, recipe_ids, per_user):
+        through = getattr(Recipe, relation).through
+        self.bulk_create(through, [
+            through(user_id=user_id, recipe_id=recipe_id)
+            for user_id in user_ids
+            for recipe_id in self.sample(recipe_ids, per_user)
+        ])
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:11
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+import recipes.operations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_auto_20231206_1344'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        recipes.operations.PostgresAddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('name', 'text', config='russian'), name='recipe_search_vector_idx'),
+        ),
+        recipes.operations.PostgresAddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='recipe_name_trgm_idx', opclasses=('gin_trgm_ops',)),
+        ),
+    ]
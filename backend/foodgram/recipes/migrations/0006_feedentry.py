@@ -0,0 +1,72 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from foodgram.constants import FEED_BACKFILL_LIMIT, FEED_BATCH_SIZE
+
+
+def backfill_feeds(apps, schema_editor):
+    """Заполнение лент по уже существующим подпискам."""
+
+    Subscription = apps.get_model('users', 'Subscription')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    FeedEntry = apps.get_model('recipes', 'FeedEntry')
+    for subscription in Subscription.objects.iterator():
+        recipes = Recipe.objects.filter(
+            author_id=subscription.author_id
+        ).order_by('-created', '-id')[:FEED_BACKFILL_LIMIT]
+        FeedEntry.objects.bulk_create(
+            (
+                FeedEntry(
+                    subscriber_id=subscription.subscriber_id,
+                    recipe_id=recipe.id,
+                    author_id=recipe.author_id,
+                    created=recipe.created,
+                )
+                for recipe in recipes
+            ),
+            batch_size=FEED_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0005_recipe_keyset_ordering'),
+        ('users', '0003_user_fan_out_on_read'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(verbose_name='Дата и время публикации рецепта')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор рецепта')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='recipes.recipe', verbose_name='Рецепт')),
+                ('subscriber', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+            options={
+                'verbose_name': 'Запись в ленте',
+                'verbose_name_plural': 'Записи в лентах',
+                'ordering': ('-created', '-recipe'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['subscriber', '-created', '-recipe'], name='feed_subscriber_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['subscriber', 'author'], name='feed_subscriber_author_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('subscriber', 'recipe'), name='unique_feed_entry'),
+        ),
+        migrations.RunPython(backfill_feeds, migrations.RunPython.noop),
+    ]
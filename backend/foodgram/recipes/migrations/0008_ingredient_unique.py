@@ -0,0 +1,49 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:18
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Объединение повторяющихся ингредиентов перед добавлением
+    ограничения уникальности: рецепты переводятся на ингредиент
+    с наименьшим id, остальные копии удаляются."""
+
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        keep_id=Min('id'), copies=Count('id')
+    ).filter(copies__gt=1)
+    for duplicate in duplicates.iterator():
+        copy_ids = Ingredient.objects.filter(
+            name=duplicate['name'],
+            measurement_unit=duplicate['measurement_unit'],
+        ).exclude(pk=duplicate['keep_id']).values_list('pk', flat=True)
+        recipe_ids = RecipeIngredient.objects.filter(
+            ingredient_id=duplicate['keep_id']
+        ).values('recipe_id')
+        RecipeIngredient.objects.filter(
+            ingredient_id__in=copy_ids, recipe_id__in=recipe_ids
+        ).delete()
+        RecipeIngredient.objects.filter(
+            ingredient_id__in=copy_ids
+        ).update(ingredient_id=duplicate['keep_id'])
+        Ingredient.objects.filter(pk__in=list(copy_ids)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:31
+
+from django.db import migrations
+
+import recipes.operations
+
+
+class Migration(migrations.Migration):
+    """Триграммные индексы по UPPER(name): их использует поиск
+    name__icontains в админке и API на PostgreSQL."""
+
+    dependencies = [
+        ('recipes', '0009_recipe_favorites_count'),
+    ]
+
+    operations = [
+        recipes.operations.PostgresRunSQL(
+            'CREATE INDEX recipe_name_upper_trgm_idx ON recipes_recipe '
+            'USING gin (UPPER(name) gin_trgm_ops)',
+            'DROP INDEX recipe_name_upper_trgm_idx',
+        ),
+        recipes.operations.PostgresRunSQL(
+            'CREATE INDEX ingredient_name_upper_trgm_idx '
+            'ON recipes_ingredient USING gin (UPPER(name) gin_trgm_ops)',
+            'DROP INDEX ingredient_name_upper_trgm_idx',
+        ),
+    ]
@@ -1,11 +1,17 @@
 from colorfield.fields import ColorField
+from django.contrib.postgres.search import SearchVector
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
-from foodgram.constants import MAX_LENGTH, MAX_VALUE, MIN_VALUE
+from foodgram.constants import MAX_LENGTH, MAX_VALUE, MIN_VALUE, SEARCH_CONFIG
+from users.mixins import CounterFieldsMixin
 from users.models import User
 from .validators import validate_slug, validate_value_greater_zero
 
+# GIN-индексы по этому выражению и по name (gin_trgm_ops) создаются
+# миграцией 0004 только в PostgreSQL.
+RECIPE_SEARCH_VECTOR = SearchVector('name', 'text', config=SEARCH_CONFIG)
+
 
 class Tag(models.Model):
     """Модель тега"""
@@ -51,14 +57,21 @@ class Ingredient(models.Model):
         verbose_name = 'Ингридиент'
         verbose_name_plural = 'Ингридиенты'
         ordering = ('name',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('name', 'measurement_unit'),
+                name='unique_ingredient'),
+        )
 
     def __str__(self):
         return f'{self.name} ({self.measurement_unit})'
 
 
-class Recipe(models.Model):
+class Recipe(CounterFieldsMixin, models.Model):
     """Модель рецепта"""
 
+    counter_fields = ('favorites_count',)
+
     name = models.CharField(
         max_length=MAX_LENGTH,
         verbose_name='Hазвание рецепта',
@@ -74,6 +87,11 @@ class Recipe(models.Model):
         upload_to='recipes/',
         null=True,
         blank=True)
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные копии изображения')
     cooking_time = models.PositiveSmallIntegerField(
         validators=[MinValueValidator(MIN_VALUE), MaxValueValidator(MAX_VALUE),
                     validate_value_greater_zero],
@@ -98,14 +116,27 @@ class Recipe(models.Model):
         related_name='shopping_cart',
         verbose_name='Список покупок',
         blank=True)
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        db_index=True,
+        verbose_name='В избранном')
     created = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата и время публикации рецепта',)
 
     class Meta:
-        ordering = ('created',)
+        ordering = ('created', 'id')
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = (
+            models.Index(
+                fields=('created', 'id'),
+                name='recipe_created_id_idx'),
+            models.Index(
+                fields=('author', '-created', '-id'),
+                name='recipe_author_latest_idx'),
+        )
 
     def __str__(self):
         return self.name
@@ -139,3 +170,46 @@ class RecipeIngredient(models.Model):
 
     def __str__(self):
         return f'{self.ingredient} {self.recipe}'
+
+
+class FeedEntry(models.Model):
+    """Модель записи в ленте подписчика"""
+
+    subscriber = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Подписчик')
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор рецепта')
+    created = models.DateTimeField(
+        verbose_name='Дата и время публикации рецепта')
+
+    class Meta:
+        verbose_name = 'Запись в ленте'
+        verbose_name_plural = 'Записи в лентах'
+        ordering = ('-created', '-recipe')
+        indexes = (
+            models.Index(
+                fields=('subscriber', '-created', '-recipe'),
+                name='feed_subscriber_created_idx'),
+            models.Index(
+                fields=('subscriber', 'author'),
+                name='feed_subscriber_author_idx'),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('subscriber', 'recipe'),
+                name='unique_feed_entry'),
+        )
+
+    def __str__(self):
+        return f'{self.recipe} в ленте {self.subscriber}'
@@ -0,0 +1,41 @@
+from django.db.migrations import AddIndex, RunSQL
+
+
+class PostgresAddIndex(AddIndex):
+    """Индекс, который создаётся только в PostgreSQL.
+
+    Индекс не входит в состояние моделей: иначе SQLite (при тестах)
+    пытался бы создать его при каждой перестройке таблицы.
+    На других СУБД операция ничего не делает.
+    """
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state)
+
+
+class PostgresRunSQL(RunSQL):
+    """SQL, который выполняется только в PostgreSQL."""
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state)
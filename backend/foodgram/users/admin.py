@@ -10,11 +10,14 @@ class UserProfileAdmin(admin.ModelAdmin):
         'first_name',
         'last_name',
         'password',
+        'recipes_count',
     )
-    list_filter = (
+    search_fields = (
         'email',
         'username',
     )
+    readonly_fields = ('recipes_count',)
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
 
@@ -23,6 +26,15 @@ class SubscriptionAdmin(admin.ModelAdmin):
         'subscriber',
         'author',
     )
+    list_select_related = (
+        'subscriber',
+        'author',
+    )
+    autocomplete_fields = (
+        'subscriber',
+        'author',
+    )
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
 
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_subscription_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='fan_out_on_read',
+            field=models.BooleanField(default=False, help_text='Включается автоматически для авторов с большим числом подписчиков, их рецепты не копируются в ленты.', verbose_name='Лента подписчиков формируется при чтении'),
+        ),
+    ]
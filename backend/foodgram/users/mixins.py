@@ -0,0 +1,23 @@
+class CounterFieldsMixin:
+    """Модель с полями-счётчиками, которые меняются только запросами
+    UPDATE с F().
+
+    При сохранении существующего объекта счётчики не записываются:
+    иначе save() вернул бы в БД значение, загруженное вместе
+    с объектом, и потерял бы изменения, сделанные после загрузки.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (not args and not self._state.adding
+                and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
@@ -2,14 +2,16 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 
 from foodgram.constants import MAX_LENGTH_EMAIL, MAX_LENGTH_USER
+from .mixins import CounterFieldsMixin
 from .validators import validate_username
 
 
-class User(AbstractUser):
+class User(CounterFieldsMixin, AbstractUser):
     """Кастомная модель User"""
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
+    counter_fields = ('recipes_count',)
 
     email = models.EmailField(
         verbose_name='Адрес электронной почты',
@@ -44,6 +46,19 @@ class User(AbstractUser):
         max_length=MAX_LENGTH_USER,
         verbose_name='Пароль',
     )
+    fan_out_on_read = models.BooleanField(
+        default=False,
+        verbose_name='Лента подписчиков формируется при чтении',
+        help_text=(
+            'Включается автоматически для авторов с большим числом '
+            'подписчиков, их рецепты не копируются в ленты.'
+        ),
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество рецептов',
+    )
 
     def __str__(self):
         return self.username